@@ -0,0 +1,321 @@
+import base64
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import current_user
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import load_only
+
+from models import db, Product, Sale, SaleItem, Payment, StoreStock
+from stores import get_current_store, get_store
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+GZIP_MIN_SIZE = 500
+ZERO = Decimal('0.00')
+
+# Fields exposed per resource. `id` and `updated_at` are always loaded because
+# the cursor is built from them.
+# Stock is not a product field: selling doesn't touch product.updated_at, so a
+# product delta can't carry it. Clients sync stock levels from /stock.
+PRODUCT_FIELDS = ('id', 'name', 'category', 'hsn_code', 'gst_rate', 'cost_price', 'selling_price',
+                  'low_stock_threshold', 'updated_at')
+SALE_COLUMNS = ('invoice_no', 'store_id', 'terminal_id', 'customer_id', 'customer_name', 'buyer_gstin',
+                'place_of_supply', 'is_interstate', 'taxable_total', 'cgst_total', 'sgst_total', 'igst_total', 'total',
+                'created_at')
+SALE_FIELDS = ('id', *SALE_COLUMNS, 'paid_amount', 'due_amount', 'updated_at', 'items')
+PAYMENT_FIELDS = ('id', 'sale_id', 'amount', 'payment_date', 'updated_at')
+STOCK_FIELDS = ('id', 'store_id', 'product_id', 'quantity', 'updated_at')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+
+@api_bp.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'Authentication required'}), 401
+
+
+@api_bp.after_request
+def compress_response(resp):
+    if (resp.status_code != 200 or resp.direct_passthrough or 'Content-Encoding' in resp.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return resp
+    body = resp.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return resp
+    resp.set_data(gzip.compress(body, compresslevel=6))
+    resp.headers['Content-Encoding'] = 'gzip'
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+# -------------------------
+# Helpers
+# -------------------------
+def _isoformat(value):
+    # Money is Decimal; it goes out as a string so no precision is lost
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def parse_fields(allowed):
+    raw = request.args.get('fields')
+    if not raw:
+        return list(allowed)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def resolve_store():
+    """
+    Store to scope the request to: ?store=<code>, ?store=all for every store,
+    otherwise the store selected in the session.
+    """
+    code = request.args.get('store')
+    if code == 'all':
+        return None
+    if code:
+        store = get_store(code.upper())
+        if not store:
+            raise ApiError('Store not found', 404)
+        return store
+    return get_current_store()
+
+
+def parse_updated_since():
+    raw = request.args.get('updated_since')
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise ApiError('updated_since must be an ISO 8601 datetime')
+
+
+def encode_cursor(row):
+    payload = json.dumps({'u': row.updated_at.isoformat(), 'id': row.id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(raw):
+    try:
+        padded = raw + '=' * (-len(raw) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['u']), int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise ApiError('Invalid cursor')
+
+
+def paginate(query, model, columns):
+    """
+    Keyset pagination over (updated_at, id).
+    - Ordering by updated_at makes `updated_since` + cursor a complete delta sync.
+    - Only the requested columns (plus the cursor columns) are loaded.
+    """
+    query = query.options(load_only(*[getattr(model, c) for c in columns]))
+
+    updated_since = parse_updated_since()
+    if updated_since:
+        query = query.filter(model.updated_at > updated_since)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        last_updated, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.updated_at > last_updated,
+            and_(model.updated_at == last_updated, model.id > last_id),
+        ))
+
+    limit = parse_limit()
+    rows = query.order_by(model.updated_at, model.id).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def conditional_json(payload):
+    """JSON response with an ETag; answers 304 when the client already has this version."""
+    resp = current_app.response_class(
+        json.dumps(payload, separators=(',', ':'), default=_isoformat),
+        mimetype='application/json',
+    )
+    resp.set_etag(hashlib.sha1(resp.get_data()).hexdigest(), weak=True)
+    return resp.make_conditional(request)
+
+
+def _columns(fields, allowed_columns):
+    return {'id', 'updated_at'} | {f for f in fields if f in allowed_columns}
+
+
+# -------------------------
+# Serializers
+# -------------------------
+def serialize_product(p, fields):
+    return {f: _isoformat(getattr(p, f)) for f in fields}
+
+
+def serialize_payment(p, fields):
+    return {f: _isoformat(getattr(p, f)) for f in fields}
+
+
+def serialize_stock(s, fields):
+    return {f: _isoformat(getattr(s, f)) for f in fields}
+
+
+def serialize_sales(sales, fields):
+    ids = [s.id for s in sales]
+
+    # One grouped query for payment totals and one for line items, instead of
+    # hitting the lazy relationships per sale.
+    paid = {}
+    if ids and ({'paid_amount', 'due_amount'} & set(fields)):
+        paid = dict(
+            db.session.query(Payment.sale_id, func.sum(Payment.amount, type_=Payment.amount.type))
+            .filter(Payment.sale_id.in_(ids)).group_by(Payment.sale_id).all()
+        )
+
+    items = {}
+    if ids and 'items' in fields:
+        rows = (db.session.query(SaleItem, Product.name)
+                .outerjoin(Product, Product.id == SaleItem.product_id)
+                .filter(SaleItem.sale_id.in_(ids))
+                .order_by(SaleItem.id).all())
+        for si, product_name in rows:
+            items.setdefault(si.sale_id, []).append({
+                'product_id': si.product_id,
+                'product_name': product_name,
+                'hsn_code': si.hsn_code,
+                'gst_rate': _isoformat(si.gst_rate),
+                'qty': si.qty,
+                'price': _isoformat(si.price),
+                'taxable_value': _isoformat(si.taxable_value),
+                'cgst': _isoformat(si.cgst),
+                'sgst': _isoformat(si.sgst),
+                'igst': _isoformat(si.igst),
+                'line_total': _isoformat(si.line_total),
+            })
+
+    result = []
+    for s in sales:
+        data = {}
+        for f in fields:
+            if f == 'paid_amount':
+                data[f] = _isoformat(paid.get(s.id, ZERO))
+            elif f == 'due_amount':
+                data[f] = _isoformat(max(s.total - paid.get(s.id, ZERO), ZERO))
+            elif f == 'items':
+                data[f] = items.get(s.id, [])
+            else:
+                data[f] = _isoformat(getattr(s, f))
+        result.append(data)
+    return result
+
+
+# -------------------------
+# Routes
+# -------------------------
+@api_bp.route('/products')
+def list_products():
+    fields = parse_fields(PRODUCT_FIELDS)
+    rows, next_cursor = paginate(Product.query, Product, _columns(fields, PRODUCT_FIELDS))
+    return conditional_json({
+        'data': [serialize_product(p, fields) for p in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_bp.route('/products/<int:product_id>')
+def get_product(product_id):
+    fields = parse_fields(PRODUCT_FIELDS)
+    product = Product.query.get(product_id)
+    if not product:
+        raise ApiError('Product not found', 404)
+    return conditional_json({'data': serialize_product(product, fields)})
+
+
+@api_bp.route('/sales')
+def list_sales():
+    fields = parse_fields(SALE_FIELDS)
+    columns = _columns(fields, SALE_COLUMNS)
+    if 'due_amount' in fields:
+        columns.add('total')
+    query = Sale.query
+    store = resolve_store()
+    if store:
+        query = query.filter(Sale.store_id == store.id)
+    rows, next_cursor = paginate(query, Sale, columns)
+    return conditional_json({
+        'data': serialize_sales(rows, fields),
+        'next_cursor': next_cursor,
+    })
+
+
+@api_bp.route('/sales/<int:sale_id>')
+def get_sale(sale_id):
+    fields = parse_fields(SALE_FIELDS)
+    sale = Sale.query.get(sale_id)
+    if not sale:
+        raise ApiError('Sale not found', 404)
+    return conditional_json({'data': serialize_sales([sale], fields)[0]})
+
+
+@api_bp.route('/payments')
+def list_payments():
+    fields = parse_fields(PAYMENT_FIELDS)
+    query = Payment.query
+    store = resolve_store()
+    if store:
+        query = query.join(Sale, Sale.id == Payment.sale_id).filter(Sale.store_id == store.id)
+    sale_id = request.args.get('sale_id', type=int)
+    if sale_id:
+        query = query.filter(Payment.sale_id == sale_id)
+    rows, next_cursor = paginate(query, Payment, _columns(fields, PAYMENT_FIELDS))
+    return conditional_json({
+        'data': [serialize_payment(p, fields) for p in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_bp.route('/stock')
+def list_stock():
+    """Per-store stock levels; use with updated_since to sync stock movements."""
+    fields = parse_fields(STOCK_FIELDS)
+    query = StoreStock.query
+    store = resolve_store()
+    if store:
+        query = query.filter(StoreStock.store_id == store.id)
+    rows, next_cursor = paginate(query, StoreStock, _columns(fields, STOCK_FIELDS))
+    return conditional_json({
+        'data': [serialize_stock(s, fields) for s in rows],
+        'next_cursor': next_cursor,
+    })
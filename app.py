@@ -1,63 +1,83 @@
 import os
-import io
-import csv
-import pandas as pd
-from datetime import datetime
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Product, Sale, SaleItem, ShopSetting, ShopInfo, Payment
-from datetime import datetime
-from invoice import generate_invoice_pdf, format_invoice_no
-from weasyprint import HTML
-from io import BytesIO, StringIO
-import os
-import pandas as pd
-from werkzeug.utils import secure_filename
-from logging.handlers import RotatingFileHandler
+import sys
+import json
+import time
 import logging
-from dotenv import load_dotenv
-
-# -------------------------
-# Load environment variables
-# -------------------------
-load_dotenv()
+import subprocess
+from logging.handlers import RotatingFileHandler
 
-# -------------------------
-# App & Config
-# -------------------------
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'fallback-dev-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'static')
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+import click
+from flask import Flask
+from flask_migrate import Migrate, upgrade, stamp
+from flask_login import LoginManager
+from sqlalchemy import inspect
+from werkzeug.security import generate_password_hash
+from dotenv import load_dotenv
 
-# -------------------------
-# DB & Migrations
-# -------------------------
-from models import db, User, Product, Sale, SaleItem, ShopSetting, ShopInfo, Payment
-db.init_app(app)
-migrate = Migrate(app, db)
+from models import db, User, Product, ShopInfo
+from idempotency import purge_expired_keys
+from cache import get_user_principal, sync_cache_version
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+# Schema of databases created with db.create_all() before migrations existed
+BASELINE_REVISION = '0001'
+
+# Modules only needed by the export/import and PDF routes. They are imported
+# lazily on first use, or up front by preload_heavy_modules() in a gunicorn
+# master running with preload_app so workers share them copy-on-write.
+HEAVY_MODULES = (
+    'pandas',
+    'reportlab.pdfgen.canvas',
+    'reportlab.platypus',
+    'reportlab.lib.colors',
+)
 
 # -------------------------
-# Login Manager
+# Extensions
 # -------------------------
+migrate = Migrate()
 login_manager = LoginManager()
-login_manager.login_view = 'login'
-login_manager.init_app(app)
+login_manager.login_view = 'main.login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return get_user_principal(int(user_id))
 
 # -------------------------
-# Logging
+# Helper Functions
 # -------------------------
-if not app.debug:
+def preload_heavy_modules():
+    """Import the lazily-loaded subsystems now. Returns the modules that imported."""
+    import importlib
+    loaded = []
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError:
+            pass
+    return loaded
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def configure_logging(app):
+    if app.debug or app.testing:
+        return
     if not os.path.exists('logs'):
         os.mkdir('logs')
     file_handler = RotatingFileHandler('logs/app.log', maxBytes=102400, backupCount=10)
@@ -67,106 +87,69 @@ if not app.debug:
     file_handler.setLevel(logging.INFO)
     app.logger.addHandler(file_handler)
     app.logger.setLevel(logging.INFO)
-    app.logger.info('App startup')
-
-# -------------------------
-# Helper Functions
-# -------------------------
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def get_next_invoice_no():
-    last = Sale.query.order_by(Sale.id.desc()).first()
-    next_no = 1 if not last else last.id + 1
-    return f"INV-{next_no:05d}"
-
-def save_invoice_pdf(sale, path):
-    from invoice import generate_invoice_pdf
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    generate_invoice_pdf(sale.id, path)
-
-# -------------------------
-# DB Initialization
-# -------------------------
-def init_db(reset=False):
-    db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-    if reset and os.path.exists(db_path):
-        os.remove(db_path)
-        print("🗑️ Existing database deleted.")
-
-    with app.app_context():
-        db.create_all()
-        print("📦 Database tables created/verified.")
-
-        # Admin user
-        if not User.query.filter_by(username='admin').first():
-            admin = User(username='admin', password_hash=generate_password_hash('admin'), is_admin=True)
-            db.session.add(admin)
-            print("✅ Admin user created")
-
-        # Default shop info
-        if not ShopInfo.query.first():
-            shop_info = ShopInfo(shop_name="Patidar Traders", address="Mugaliya", phone="1234567890",
-                                 gstin="GSTN000001", logo_filename="logo.png")
-            db.session.add(shop_info)
-            print("✅ Default shop info added")
-
-        db.session.commit()
-        print("💾 Database initialization complete")
-
-# -------------------------
-# Routes (simplified example)
-# -------------------------
-@app.route('/')
-@login_required
-def index():
-    products = Product.query.all()
-    sales = Sale.query.order_by(Sale.created_at.desc()).limit(5).all()
-    low_stock = [p for p in products if p.quantity <= p.low_stock_threshold]
-    shop = ShopInfo.query.first()
-    return render_template('index.html', products=products, sales=sales, low_stock=low_stock, shop=shop)
 
 # -------------------------
-# Add your other routes here
+# App Factory
 # -------------------------
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        username = request.form['username'].strip()
-        password = request.form['password']
-
-        user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password_hash, password):
-            login_user(user)
-            return redirect(url_for('index'))
-        else:
-            flash("Invalid username or password", "danger")
-
-    return render_template('login.html')
-
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for('login'))
-
-# Example protected route
-@app.route('/products')
-@login_required
-def products():
-    items = Product.query.all()
-    shop = ShopInfo.query.first()
-    return render_template('products.html', products=items,shop=shop)
+def create_app(config=None):
+    started = time.perf_counter()
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'fallback-dev-key')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'static')
+    app.config['IDEMPOTENCY_TTL_HOURS'] = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', 24))
+    app.config['IDEMPOTENCY_LEASE_SECONDS'] = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 60))
+    app.config['SETTINGS_CACHE_TTL'] = int(os.environ.get('SETTINGS_CACHE_TTL', 60))
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    # Batch mode so column changes work on SQLite (table copy-and-move)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
+    login_manager.init_app(app)
+    app.before_request(sync_cache_version)
+
+    from views import main_bp
+    from exports import exports_bp
+    from api import api_bp
+    from customers import customers_bp
+    from stores import stores_bp
+    from tax import gst_bp
+    app.register_blueprint(main_bp)
+    app.register_blueprint(exports_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(customers_bp)
+    app.register_blueprint(stores_bp)
+    app.register_blueprint(gst_bp)
+
+    register_cli(app)
+    configure_logging(app)
+
+    app.config['STARTUP_MS'] = (time.perf_counter() - started) * 1000
+    app.logger.info(f"App startup in {app.config['STARTUP_MS']:.0f} ms")
+    return app
 
 # -------------------------
 # DB Init with Admin
 # -------------------------
-import os
-from werkzeug.security import generate_password_hash
-from models import db, User, Product, ShopInfo
+def upgrade_db():
+    """
+    Bring the schema up to date with migrations/.
+    - A new database is built from the migrations.
+    - A database created by db.create_all() before migrations existed has no
+      alembic_version table; it is stamped at the baseline and upgraded, which
+      backfills its customers, stores and per-store stock.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if tables and 'alembic_version' not in tables:
+        stamp(directory=MIGRATIONS_DIR, revision=BASELINE_REVISION)
+        print("ℹ Existing database stamped at the baseline revision.")
+    upgrade(directory=MIGRATIONS_DIR)
 
-def init_db(reset=False):
+def init_db(app, reset=False):
     """
     Initialize the database safely.
     - reset=True will delete the existing DB.
@@ -179,8 +162,8 @@ def init_db(reset=False):
         print("🗑️ Existing database deleted.")
 
     with app.app_context():
-        db.create_all()
-        print("📦 Database tables created/verified.")
+        upgrade_db()
+        print("📦 Database migrated to the latest schema.")
 
         # 1️⃣ Default admin
         admin_user = User.query.filter_by(username='admin').first()
@@ -195,7 +178,11 @@ def init_db(reset=False):
         else:
             print("ℹ Admin already exists.")
 
-        # 2️⃣ Sample products
+        # 2️⃣ Default store
+        from stores import ensure_default_store, set_stock
+        store = ensure_default_store()
+
+        # 3️⃣ Sample products
         sample_products = [
             ('1', 'Apple', 30.0, 50, 30.0, 5),
             ('2', 'Banana', 10.0, 100, 10.0, 10),
@@ -209,15 +196,16 @@ def init_db(reset=False):
                     name=name,
                     selling_price=selling_price,
                     cost_price=cost_price,
-                    quantity=quantity,
                     low_stock_threshold=low_stock_threshold
                 )
                 db.session.add(p)
+                db.session.flush()
+                set_stock(store.id, p.id, quantity)
                 print(f"✅ Product added: {name}")
             else:
                 print(f"ℹ Product already exists: {name}")
 
-        # 3️⃣ Default shop info
+        # 4️⃣ Default shop info
         shop_info = ShopInfo.query.first()
         if not shop_info:
             shop_info = ShopInfo(
@@ -235,398 +223,67 @@ def init_db(reset=False):
         db.session.commit()
         print("💾 Database initialization complete.")
 
-@app.route('/sales', methods=['GET', 'POST'])
-@login_required
-def sales():
-    products = Product.query.all()
-    if request.method == 'POST':
-        product_id = int(request.form['product_id'])
-        qty = int(request.form['quantity'])
-        customer_name = request.form.get('customer_name', '') or 'Ashish Patil'
-        customer_contact = request.form.get('customer_contact')
-        customer_address = request.form.get('customer_address')
-
-        prod = Product.query.get_or_404(product_id)
-        if prod.quantity < qty:
-            flash('Insufficient stock.', 'danger')
-            return redirect(url_for('sales'))
-
-        prod.quantity -= qty
-        invoice_no = get_next_invoice_no()
-        total = qty * prod.selling_price
-        sale = Sale(
-            invoice_no=invoice_no,
-            product_id=product_id,
-            product_name=prod.name,
-            quantity=qty,
-            customer_name=customer_name,
-            customer_contact=customer_contact,
-            customer_address=customer_address,
-            unit_price=prod.selling_price,
-            total_price=total
-        )
-        db.session.add(sale)
-        db.session.commit()
-
-        # Generate PDF on disk
-        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{invoice_no}.pdf")
-        save_invoice_pdf(sale, pdf_path)
-
-        flash('Sale recorded and invoice generated.', 'success')
-        return redirect(url_for('invoice', sale_id=sale.id))
-    sales = Sale.query.order_by(Sale.created_at.desc()).all()
-    shop = ShopInfo.query.first()
-    return render_template('sales.html', products=products, sales=sales,shop=shop)
-
-@app.route('/settings', methods=['GET', 'POST'])
-@login_required
-def settings():
-    shop = ShopInfo.query.first()
-    if not shop:
-        shop = ShopInfo()
-        db.session.add(shop)
-        db.session.commit()
-
-    if request.method == 'POST':
-        shop.shop_name = request.form['shop_name']
-        shop.address = request.form['address']
-        shop.phone = request.form['phone']
-        shop.gstin = request.form['gstin']
-
-        file = request.files.get('logo')
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            shop.logo_filename = filename
-
-        db.session.commit()
-        flash("Shop details updated!", "success")
-        return redirect(url_for('settings'))
-
-    return render_template('settings.html', shop=shop)
-
-# --- CSV Export ---
-
-@app.route('/products/export')
-@login_required
-def export_products():
-    products = Product.query.all()
-    data = [{
-        'Name': p.name,
-        'Category': p.category,
-        'Cost Price': p.cost_price,
-        'Selling Price': p.selling_price,
-        'Quantity': p.quantity
-    } for p in products]
-    df = pd.DataFrame(data)
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    buf.seek(0)
-    return send_file(
-        io.BytesIO(buf.getvalue().encode()),
-        as_attachment=True, download_name="products.csv",
-        mimetype='text/csv'
-    )
-@app.route('/sales/export')
-@login_required
-def export_sales():
-    sales = Sale.query.all()
-    data = [{
-        'Invoice': s.invoice_no,
-        'Product': s.product_name,
-        'Quantity': s.quantity,
-        'Customer Name': s.customer_name,
-        'Contact': s.customer_contact,
-        'Address': s.customer_address,
-        'Date': s.created_at.strftime('%d-%m-%Y %I:%M %p'),
-        'Unit Price': s.unit_price,
-        'Total Price': s.total_price
-    } for s in sales]
-    df = pd.DataFrame(data)
-    buf = io.StringIO()
-    df.to_csv(buf, index=False)
-    buf.seek(0)
-    return send_file(
-        io.BytesIO(buf.getvalue().encode()),
-        as_attachment=True, download_name="sales.csv",
-        mimetype='text/csv'
+# -------------------------
+# CLI
+# -------------------------
+# Runs in a fresh interpreter so the numbers reflect a real cold start.
+STARTUP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app, current_rss_mb, preload_heavy_modules, HEAVY_MODULES
+app = create_app({'TESTING': True})
+t1 = time.perf_counter()
+result = {'create_app_ms': (t1 - t0) * 1000, 'rss_mb': current_rss_mb()}
+if sys.argv[1] == '1':
+    preload_heavy_modules()
+    result['preload_ms'] = (time.perf_counter() - t1) * 1000
+    result['preloaded_rss_mb'] = current_rss_mb()
+result['heavy_loaded'] = [m for m in HEAVY_MODULES if m in sys.modules]
+print(json.dumps(result))
+"""
+
+def measure_startup(preload=False):
+    out = subprocess.run(
+        [sys.executable, '-c', STARTUP_PROBE, '1' if preload else '0'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
     )
-
-@app.route('/import/products', methods=['GET','POST'])
-@login_required
-def import_products():
-    if request.method == 'POST':
-        f = request.files.get('file')
-        if not f:
-            flash('No file uploaded', 'danger')
-            return redirect(url_for('import_products'))
-
-        try:
-            stream = StringIO(f.stream.read().decode('utf-8'))
-        except UnicodeDecodeError:
-            flash('Invalid file encoding. Please upload a UTF-8 CSV.', 'danger')
-            return redirect(url_for('import_products'))
-
-        reader = csv.DictReader(stream)
-        count = 0
-        for row in reader:
-            try:
-                p = Product(
-                    name=row.get('Name'),
-                    category=row.get('Category'),
-                    cost_price=float(row.get('Cost Price') or 0),
-                    selling_price=float(row.get('Selling Price') or 0),
-                    quantity=int(row.get('Quantity') or 0),
-                    low_stock_threshold=int(row.get('Threshold') or 0)
-                )
-                db.session.add(p)
-                count += 1
-            except Exception as e:
-                app.logger.error(f"Skipping row due to error: {e}")
-                continue
-
-        db.session.commit()
-        flash(f'Imported {count} products', 'success')
-        return redirect(url_for('index'))
-
-    return render_template('import_products.html')
-
-@app.route('/products/edit/<int:pid>', methods=['GET', 'POST'])
-@login_required
-def edit_product(pid):
-    product = Product.query.get_or_404(pid)
-    if request.method == 'POST':
-        try:
-            product.name = request.form['name']
-            product.category = request.form['category']
-            product.cost_price = float(request.form['cost_price'])
-            product.selling_price = float(request.form['selling_price'])
-            product.quantity = int(request.form['quantity'])
-            product.low_stock_threshold = int(request.form['threshold'])
-            db.session.commit()
-            flash('Product updated successfully.', 'success')
-            return redirect(url_for('products'))
-        except Exception as e:
-            flash(f'Error updating product: {e}', 'danger')
-    products = Product.query.all()
-    return render_template("products.html", products=products, edit_product=product)
-
-@app.route('/products/add', methods=['POST'])
-@login_required
-def add_product():
-    try:
-        product = Product(
-            name=request.form['name'],
-            category=request.form.get('category', ''),
-            cost_price=float(request.form['cost_price']),
-            selling_price=float(request.form['selling_price']),
-            quantity=int(request.form['quantity']),
-            low_stock_threshold=int(request.form.get('threshold', 5))
-        )
-        db.session.add(product)
-        db.session.commit()
-        flash('Product added successfully.', 'success')
-    except Exception as e:
-        flash(f'Error adding product: {e}', 'danger')
-    return redirect(url_for('products'))
-
-@app.route('/products/delete/<int:pid>')
-@login_required
-def delete_product(pid):
-    prod = Product.query.get_or_404(pid)
-    db.session.delete(prod)
-    db.session.commit()
-    flash('Product deleted!', 'success')
-    return redirect(url_for('products'))
-
-from flask import request, jsonify
-from sqlalchemy.exc import SQLAlchemyError
-
-@app.route('/create-sale', methods=['POST'])
-def create_sale():
-    data = request.get_json()
-    if not data or 'items' not in data or not data.get('customer_name'):
-        return jsonify({'error': 'Bad request, missing customer name or items'}), 400
-
-    customer_name = data['customer_name'].strip()
-    if not customer_name:
-        return jsonify({'error': 'Customer name cannot be empty'}), 400
-
-    items_data = data['items']
-    if not items_data:
-        return jsonify({'error': 'At least one item is required'}), 400
-
-    payment_amount = float(data.get('payment_amount', 0))  # optional initial payment
-
-    try:
-        # Cleanup old sales (keep last 5)
-        last_5_sales = Sale.query.order_by(Sale.id.desc()).limit(5).all()
-        if last_5_sales:
-            min_id_to_keep = last_5_sales[-1].id
-            old_sales = Sale.query.filter(Sale.id < min_id_to_keep).all()
-            for old_sale in old_sales:
-                invoice_file = os.path.join('invoices', f"{old_sale.invoice_no}.pdf")
-                if os.path.exists(invoice_file):
-                    os.remove(invoice_file)
-                SaleItem.query.filter_by(sale_id=old_sale.id).delete()
-                Payment.query.filter_by(sale_id=old_sale.id).delete()
-                db.session.delete(old_sale)
-            db.session.commit()
-
-        # Generate invoice number
-        last = Sale.query.order_by(Sale.id.desc()).first()
-        next_no = 1 if not last else last.id + 1
-        inv_no = format_invoice_no(next_no)
-
-        # Create Sale
-        sale = Sale(invoice_no=inv_no, customer_name=customer_name, total=0)
-        db.session.add(sale)
-        db.session.flush()  # get sale.id
-
-        total = 0
-        for it in items_data:
-            product_id = it.get('product_id')
-            qty = int(it.get('quantity', 0))
-            if qty < 1:
-                db.session.rollback()
-                return jsonify({'error': f'Invalid quantity for product {product_id}'}), 400
-
-            product = Product.query.get(product_id)
-            if not product:
-                db.session.rollback()
-                return jsonify({'error': f'Product with ID {product_id} not found'}), 404
-
-            if product.quantity < qty:
-                db.session.rollback()
-                return jsonify({'error': f'Insufficient stock for product {product.name}'}), 400
-
-            price = product.selling_price
-            sale_item = SaleItem(sale_id=sale.id, product_id=product.id, qty=qty, price=price)
-            product.quantity -= qty
-            total += qty * price
-            db.session.add(sale_item)
-
-        sale.total = total
-        db.session.flush()
-
-        # Create Payment if amount > 0
-        if payment_amount > 0:
-            if payment_amount > total:
-                payment_amount = total  # cannot pay more than total
-            payment = Payment(sale_id=sale.id, amount=payment_amount)
-            db.session.add(payment)
-
-        db.session.commit()
-
-        # Generate invoice PDF
-        os.makedirs('invoices', exist_ok=True)
-        invoice_path = os.path.join('invoices', f"{sale.invoice_no}.pdf")
-        generate_invoice_pdf(sale.id, invoice_path)
-
-        return jsonify({
-            'invoice': invoice_path,
-            'invoice_no': sale.invoice_no,
-            'paid_amount': payment_amount,
-            'due_amount': sale.total - payment_amount
-        })
-
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({'error': 'Database error', 'details': str(e)}), 500
-
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': 'Unexpected error', 'details': str(e)}), 500
-
-
-@app.route('/invoice/<invoice_no>')
-def get_invoice(invoice_no):
-    path = os.path.join('invoices', f"{invoice_no}.pdf")
-    if os.path.exists(path):
-        return send_file(path)
-    return 'Not found', 404
-
-@app.route('/invoice_view/<invoice_no>')
-def invoice_view(invoice_no):
-    sale = Sale.query.filter_by(invoice_no=invoice_no).first_or_404()
-    items = SaleItem.query.filter_by(sale_id=sale.id).all()
-    # Attach products for template
-    for si in items:
-        si.product = Product.query.get(si.product_id)
-    return render_template('invoice_view.html', sale=sale, items=items)
-
-# Allowed extensions for logo upload
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-UPLOAD_FOLDER = 'static'
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-from flask import render_template, request, redirect, url_for, flash
-from flask_login import login_required
-from datetime import datetime
-from models import Sale, Payment, db
-
-@app.route('/payments', methods=['GET', 'POST'])
-@login_required
-def payments():
-    if request.method == 'POST':
-        sale_id = request.form.get('sale_id')
-        amount = request.form.get('amount')
-        if not sale_id or not amount:
-            flash("Sale or amount missing!", "danger")
-            return redirect(url_for('payments'))
-
-        try:
-            amount = float(amount)
-        except ValueError:
-            flash("Invalid amount!", "danger")
-            return redirect(url_for('payments'))
-
-        sale = Sale.query.get(sale_id)
-        if not sale:
-            flash("Sale not found!", "danger")
-            return redirect(url_for('payments'))
-
-        # Add new payment
-        payment = Payment(sale_id=sale.id, amount=amount)
-        db.session.add(payment)
-        db.session.commit()
-        flash(f"Payment of ₹{amount:.2f} recorded for Invoice {sale.invoice_no}", "success")
-        return redirect(url_for('payments'))
-
-    # GET request: show all sales
-    sales = Sale.query.order_by(Sale.created_at.desc()).all()
-    return render_template('payments.html', sales=sales,Payment=Payment)
-
-@app.route('/add-payment/<int:sale_id>', methods=['POST'])
-@login_required
-def add_payment(sale_id):
-    try:
-        sale = Sale.query.get_or_404(sale_id)
-        data = request.get_json()
-        if not data or 'amount' not in data:
-            return jsonify({'error': 'Invalid request'}), 400
-
-        amount = float(data['amount'])
-        due = sale.total - sale.paid_amount
-
-        if amount <= 0 or amount > due:
-            return jsonify({'error': 'Invalid payment amount'}), 400
-
-        payment = Payment(sale_id=sale.id, amount=amount)
-        db.session.add(payment)
-        db.session.commit()
-        return jsonify({'success': True, 'paid_amount': sale.paid_amount + amount})
-
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def register_cli(app):
+    @app.cli.command('init-db')
+    @click.option('--reset', is_flag=True, help='Delete the existing database first.')
+    def init_db_command(reset):
+        """Migrate the schema and seed the admin user, sample products and shop info."""
+        init_db(app, reset=reset)
+
+    @app.cli.command('purge-idempotency-keys')
+    def purge_idempotency_keys_command():
+        """Delete expired idempotency keys (also done automatically on each keyed request)."""
+        removed = purge_expired_keys()
+        print(f"🗑️ Removed {removed} expired idempotency keys.")
+
+    @app.cli.command('startup-time')
+    @click.option('--runs', default=3, show_default=True, help='Number of cold starts to measure.')
+    @click.option('--preload', is_flag=True, help='Also import the lazily-loaded subsystems.')
+    def startup_time_command(runs, preload):
+        """Measure cold-start time and per-worker RSS."""
+        results = [measure_startup(preload) for _ in range(runs)]
+        create_ms = sorted(r['create_app_ms'] for r in results)[len(results) // 2]
+        rss = results[-1]['rss_mb']
+        print(f"⏱️ Cold start (median of {runs}): {create_ms:.0f} ms")
+        if rss is not None:
+            print(f"📦 Worker RSS after startup: {rss:.1f} MB")
+        if preload:
+            preload_ms = sorted(r['preload_ms'] for r in results)[len(results) // 2]
+            print(f"⏱️ Preloading heavy modules: {preload_ms:.0f} ms")
+            if results[-1]['preloaded_rss_mb'] is not None:
+                print(f"📦 RSS with heavy modules: {results[-1]['preloaded_rss_mb']:.1f} MB")
+        print(f"ℹ Heavy modules loaded: {', '.join(results[-1]['heavy_loaded']) or 'none'}")
 
 # -------------------------
 # Main Entry
 # -------------------------
 if __name__ == '__main__':
-    init_db(reset=False)  # safe init
+    app = create_app()
+    init_db(app, reset=False)  # safe init
     app.run(debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from flask import current_app, request
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, User, ShopInfo, ShopSetting, Store, Terminal
+
+DEFAULT_TTL_SECONDS = 60
+
+# ShopSetting row holding a token that changes on every committed change to a
+# cached table; each process compares it per request to drop stale entries.
+CACHE_VERSION_KEY = 'cache_version'
+
+# Typed configuration stored in ShopSetting: key -> (type, default, label)
+SETTINGS = {
+    'invoice_prefix': ('str', 'INV', 'Invoice number prefix'),
+    'default_low_stock_threshold': ('int', 5, 'Default low-stock threshold'),
+    'prices_include_tax': ('bool', True, 'Selling prices include GST'),
+}
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache.
+    - Entries expire after SETTINGS_CACHE_TTL seconds.
+    - invalidate() bumps a version number, dropping every entry in this process at once.
+    - Other workers are invalidated through the shared version, see sync_cache_version().
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] == self.version and entry[1] > now:
+                return entry[2]
+            version = self.version
+        value = loader()
+        ttl = current_app.config.get('SETTINGS_CACHE_TTL', DEFAULT_TTL_SECONDS)
+        with self._lock:
+            # Don't store a value loaded before a concurrent invalidation
+            if version == self.version:
+                self._data[key] = (version, now + ttl, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+
+settings_cache = TTLCache()
+user_cache = TTLCache()
+
+
+# -------------------------
+# Invalidation
+# -------------------------
+# Any committed change to shop info/settings/stores or users invalidates the matching
+# cache, whichever code path made it: at once in this process, and in the other
+# workers on their next request through the shared version row.
+@event.listens_for(Session, 'before_flush')
+def _track_cached_changes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (ShopInfo, ShopSetting, Store, Terminal)):
+            session.info['settings_changed'] = True
+            session.info['bump_version'] = True
+        elif isinstance(obj, User):
+            session.info['users_changed'] = True
+            session.info['bump_version'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_shared_version(session, flush_context):
+    # Written in the same transaction, so it only changes if the change commits
+    if not session.info.pop('bump_version', False):
+        return
+    table = ShopSetting.__table__
+    version = uuid.uuid4().hex
+    conn = session.connection()
+    updated = conn.execute(
+        table.update().where(table.c.key == CACHE_VERSION_KEY).values(value=version)
+    ).rowcount
+    if not updated:
+        conn.execute(table.insert().values(key=CACHE_VERSION_KEY, value=version, value_type='str'))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('settings_changed', False):
+        settings_cache.invalidate()
+    if session.info.pop('users_changed', False):
+        user_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('settings_changed', None)
+    session.info.pop('users_changed', None)
+    session.info.pop('bump_version', None)
+
+
+_seen_version = None
+
+
+def sync_cache_version():
+    """
+    before_request hook: drop this process's cached entries if another worker
+    has committed a change since the last request (one indexed lookup).
+    """
+    global _seen_version
+    if request.endpoint == 'static':
+        return
+    table = ShopSetting.__table__
+    version = db.session.execute(
+        db.select(table.c.value).where(table.c.key == CACHE_VERSION_KEY)
+    ).scalar()
+    if version != _seen_version:
+        _seen_version = version
+        settings_cache.invalidate()
+        user_cache.invalidate()
+
+
+# -------------------------
+# Shop info
+# -------------------------
+def _snapshot(obj):
+    # Plain copy of the row: ORM instances can't outlive the request's session
+    return SimpleNamespace(**{c.name: getattr(obj, c.name) for c in obj.__table__.columns})
+
+
+def get_shop_info():
+    """Cached, read-only copy of the ShopInfo row (or None)."""
+    def load():
+        shop = ShopInfo.query.first()
+        return _snapshot(shop) if shop else None
+    return settings_cache.get('shop_info', load)
+
+
+# -------------------------
+# Typed settings
+# -------------------------
+def _decode(value, value_type):
+    if value is None:
+        return None
+    if value_type == 'int':
+        return int(value)
+    if value_type == 'float':
+        return float(value)
+    if value_type == 'bool':
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if value_type == 'json':
+        return json.loads(value)
+    return value
+
+
+def _encode(value, value_type):
+    if value is None:
+        return None
+    if value_type == 'bool':
+        return 'true' if value else 'false'
+    if value_type == 'json':
+        return json.dumps(value)
+    return str(value)
+
+
+def parse_setting(key, raw):
+    """Convert a form/string value for a registered setting to its type. Raises ValueError."""
+    value_type = SETTINGS[key][0]
+    if value_type == 'bool':
+        return raw is not None and raw.lower() in ('1', 'true', 'yes', 'on')
+    return _decode(raw.strip(), value_type)
+
+
+def get_settings():
+    """All settings as a typed dict, registered defaults filled in. One query per TTL."""
+    def load():
+        values = {key: default for key, (_, default, _) in SETTINGS.items()}
+        for s in ShopSetting.query.filter(ShopSetting.key != CACHE_VERSION_KEY):
+            value_type = s.value_type or (SETTINGS[s.key][0] if s.key in SETTINGS else 'str')
+            try:
+                values[s.key] = _decode(s.value, value_type)
+            except ValueError:
+                current_app.logger.error(f"Invalid value for setting {s.key}: {s.value!r}")
+        return values
+    return settings_cache.get('settings', load)
+
+
+def get_setting(key, default=None):
+    return get_settings().get(key, default)
+
+
+def set_setting(key, value, value_type=None):
+    """Stage a typed setting on the session; the cache is invalidated when it commits."""
+    if value_type is None:
+        value_type = SETTINGS[key][0] if key in SETTINGS else 'str'
+    setting = ShopSetting.query.filter_by(key=key).first()
+    if not setting:
+        setting = ShopSetting(key=key)
+        db.session.add(setting)
+    setting.value = _encode(value, value_type)
+    setting.value_type = value_type
+    return setting
+
+
+# -------------------------
+# User principal
+# -------------------------
+class CachedUser(UserMixin):
+    """Lightweight stand-in for User attached to current_user on each request."""
+
+    def __init__(self, id, username, is_admin):
+        self.id = id
+        self.username = username
+        self.is_admin = is_admin
+
+
+def get_user_principal(user_id):
+    def load():
+        user = db.session.get(User, user_id)
+        return CachedUser(user.id, user.username, user.is_admin) if user else None
+    return user_cache.get(user_id, load)
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+from sqlalchemy import select, union_all, literal, func, case, or_, Numeric
+
+from models import db, Customer, Sale, Payment
+
+customers_bp = Blueprint('customers', __name__, url_prefix='/customers')
+
+AGING_BUCKETS = ('0-30', '31-60', '60+')
+ZERO = Decimal('0.00')
+
+# -------------------------
+# Helper Functions
+# -------------------------
+def find_or_create_customer(name, phone=None, address=None, gstin=None):
+    """Look a customer up by phone (or exact name when no phone is given), creating one if missing."""
+    name = name.strip()
+    phone = phone.strip() if phone else None
+    if phone:
+        customer = Customer.query.filter_by(phone=phone).first()
+    else:
+        customer = Customer.query.filter_by(name=name, phone=None).first()
+    if not customer:
+        customer = Customer(name=name, phone=phone, address=address, gstin=gstin, balance=0)
+        db.session.add(customer)
+        db.session.flush()
+    elif gstin and customer.gstin != gstin:
+        customer.gstin = gstin
+    return customer
+
+def adjust_balance(customer_id, delta):
+    """Atomically add `delta` to a customer's outstanding balance (part of the caller's transaction)."""
+    if not customer_id or not delta:
+        return
+    db.session.execute(
+        Customer.__table__.update()
+        .where(Customer.__table__.c.id == customer_id)
+        .values(balance=Customer.__table__.c.balance + delta, updated_at=datetime.utcnow())
+    )
+
+def statement_query(customer_id, date_from=None, date_to=None):
+    """
+    Sales (debits) and payments (credits) for one customer with a running
+    balance, computed in a single query with a window function. The window
+    runs over the full history so the running balance is correct even when
+    only a date range is returned.
+    """
+    sales = (
+        select(
+            literal('sale').label('entry_type'),
+            Sale.id.label('sale_id'),
+            Sale.invoice_no.label('reference'),
+            Sale.created_at.label('date'),
+            Sale.total.label('debit'),
+            literal(ZERO, Numeric(12, 2)).label('credit'),
+        )
+        .where(Sale.customer_id == customer_id)
+    )
+    payments = (
+        select(
+            literal('payment').label('entry_type'),
+            Payment.sale_id.label('sale_id'),
+            Sale.invoice_no.label('reference'),
+            Payment.payment_date.label('date'),
+            literal(ZERO, Numeric(12, 2)).label('debit'),
+            Payment.amount.label('credit'),
+        )
+        .join(Sale, Sale.id == Payment.sale_id)
+        .where(Sale.customer_id == customer_id)
+    )
+    entries = union_all(sales, payments).subquery()
+    # A sale sorts before payments made at the same instant
+    ordering = (entries.c.date, entries.c.entry_type.desc(), entries.c.sale_id)
+    ledger = select(
+        entries,
+        func.sum(entries.c.debit - entries.c.credit).over(order_by=ordering, rows=(None, 0)).label('balance'),
+    ).subquery()
+
+    stmt = select(ledger)
+    if date_from:
+        stmt = stmt.where(ledger.c.date >= date_from)
+    if date_to:
+        stmt = stmt.where(ledger.c.date < date_to)
+    return stmt.order_by(ledger.c.date, ledger.c.entry_type.desc(), ledger.c.sale_id)
+
+def aging_query(now=None):
+    """Outstanding due per customer split into 0-30 / 31-60 / 60+ day buckets, in one grouped query."""
+    now = now or datetime.utcnow()
+    cutoff_30 = now - timedelta(days=30)
+    cutoff_60 = now - timedelta(days=60)
+
+    paid = (
+        select(Payment.sale_id, func.sum(Payment.amount).label('paid'))
+        .group_by(Payment.sale_id)
+        .subquery()
+    )
+    due = Sale.total - func.coalesce(paid.c.paid, 0)
+
+    def bucket(condition):
+        return func.sum(case((condition, due), else_=0), type_=Numeric(12, 2))
+
+    return (
+        select(
+            Customer.id,
+            Customer.name,
+            Customer.phone,
+            bucket(Sale.created_at >= cutoff_30).label('0-30'),
+            bucket((Sale.created_at < cutoff_30) & (Sale.created_at >= cutoff_60)).label('31-60'),
+            bucket(Sale.created_at < cutoff_60).label('60+'),
+            func.sum(due, type_=Numeric(12, 2)).label('total_due'),
+        )
+        .join(Sale, Sale.customer_id == Customer.id)
+        .outerjoin(paid, paid.c.sale_id == Sale.id)
+        .where(due > 0)
+        .group_by(Customer.id, Customer.name, Customer.phone)
+        .order_by(func.sum(due).desc())
+    )
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+def serialize_customer(c):
+    return {'id': c.id, 'name': c.name, 'phone': c.phone, 'address': c.address, 'gstin': c.gstin,
+            'balance': c.balance}
+
+# -------------------------
+# Routes
+# -------------------------
+@customers_bp.route('')
+@login_required
+def list_customers():
+    q = request.args.get('q', '').strip()
+    query = Customer.query
+    if q:
+        # Prefix match so the name/phone indexes can be used
+        query = query.filter(or_(Customer.name.like(f'{q}%'), Customer.phone.like(f'{q}%')))
+    if request.args.get('with_balance'):
+        query = query.filter(Customer.balance > 0)
+    customers = query.order_by(Customer.name).limit(request.args.get('limit', 50, type=int)).all()
+    return jsonify([serialize_customer(c) for c in customers])
+
+@customers_bp.route('/<int:customer_id>/statement')
+@login_required
+def customer_statement(customer_id):
+    customer = Customer.query.get_or_404(customer_id)
+    try:
+        date_from = _parse_date(request.args.get('from'))
+        date_to = _parse_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'from/to must be ISO dates'}), 400
+
+    rows = db.session.execute(statement_query(customer.id, date_from, date_to)).mappings().all()
+    entries = [{
+        'type': r['entry_type'],
+        'sale_id': r['sale_id'],
+        'reference': r['reference'],
+        'date': r['date'].isoformat() if r['date'] else None,
+        'debit': r['debit'],
+        'credit': r['credit'],
+        'balance': r['balance'],
+    } for r in rows]
+    return jsonify({
+        'customer': serialize_customer(customer),
+        'opening_balance': (entries[0]['balance'] - entries[0]['debit'] + entries[0]['credit']) if entries else None,
+        'closing_balance': entries[-1]['balance'] if entries else None,
+        'entries': entries,
+    })
+
+@customers_bp.route('/aging')
+@login_required
+def aging_report():
+    rows = db.session.execute(aging_query()).mappings().all()
+    totals = {b: sum((r[b] for r in rows), ZERO) for b in AGING_BUCKETS}
+    return jsonify({
+        'generated_at': datetime.utcnow().isoformat(),
+        'customers': [{
+            'id': r['id'],
+            'name': r['name'],
+            'phone': r['phone'],
+            **{b: r[b] for b in AGING_BUCKETS},
+            'total_due': r['total_due'],
+        } for r in rows],
+        'totals': {**totals, 'total_due': sum(totals.values(), ZERO)},
+    })
@@ -0,0 +1,110 @@
+import io
+from io import StringIO
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, flash, send_file
+from flask_login import login_required
+from models import db, Product, Sale
+from stores import get_current_store, products_with_stock, set_stock
+from tax import to_money, to_rate
+
+# pandas and csv are imported inside the views: they are only needed here and
+# keeping them out of module import keeps worker boot fast.
+exports_bp = Blueprint('exports', __name__)
+
+@exports_bp.route('/products/export')
+@login_required
+def export_products():
+    products = products_with_stock(get_current_store().id).all()
+    data = [{
+        'Name': p.name,
+        'Category': p.category,
+        'HSN Code': p.hsn_code,
+        'GST Rate': p.gst_rate,
+        'Cost Price': p.cost_price,
+        'Selling Price': p.selling_price,
+        'Quantity': p.quantity
+    } for p in products]
+    import pandas as pd
+    df = pd.DataFrame(data)
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    return send_file(
+        io.BytesIO(buf.getvalue().encode()),
+        as_attachment=True, download_name="products.csv",
+        mimetype='text/csv'
+    )
+
+@exports_bp.route('/sales/export')
+@login_required
+def export_sales():
+    store = get_current_store()
+    sales = Sale.query.filter_by(store_id=store.id).order_by(Sale.created_at).all()
+    data = [{
+        'Invoice': s.invoice_no,
+        'Store': store.code,
+        'Customer Name': s.customer_name,
+        'Date': s.created_at.strftime('%d-%m-%Y %I:%M %p'),
+        'Place of Supply': s.place_of_supply,
+        'Taxable Value': s.taxable_total,
+        'CGST': s.cgst_total,
+        'SGST': s.sgst_total,
+        'IGST': s.igst_total,
+        'Total Price': s.total
+    } for s in sales]
+    import pandas as pd
+    df = pd.DataFrame(data)
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    return send_file(
+        io.BytesIO(buf.getvalue().encode()),
+        as_attachment=True, download_name="sales.csv",
+        mimetype='text/csv'
+    )
+
+@exports_bp.route('/import/products', methods=['GET','POST'])
+@login_required
+def import_products():
+    if request.method == 'POST':
+        f = request.files.get('file')
+        if not f:
+            flash('No file uploaded', 'danger')
+            return redirect(url_for('exports.import_products'))
+
+        try:
+            stream = StringIO(f.stream.read().decode('utf-8'))
+        except UnicodeDecodeError:
+            flash('Invalid file encoding. Please upload a UTF-8 CSV.', 'danger')
+            return redirect(url_for('exports.import_products'))
+
+        import csv
+        reader = csv.DictReader(stream)
+        store = get_current_store()
+        count = 0
+        for row in reader:
+            try:
+                # Savepoint per row so a bad row doesn't undo the ones before it
+                with db.session.begin_nested():
+                    p = Product(
+                        name=row.get('Name'),
+                        category=row.get('Category'),
+                        hsn_code=(row.get('HSN Code') or '').strip() or None,
+                        gst_rate=to_rate(row.get('GST Rate')),
+                        cost_price=to_money(row.get('Cost Price')),
+                        selling_price=to_money(row.get('Selling Price')),
+                        low_stock_threshold=int(row.get('Threshold') or 0)
+                    )
+                    quantity = int(row.get('Quantity') or 0)
+                    db.session.add(p)
+                    db.session.flush()
+                    set_stock(store.id, p.id, quantity)
+                count += 1
+            except Exception as e:
+                current_app.logger.error(f"Skipping row due to error: {e}")
+                continue
+
+        db.session.commit()
+        flash(f'Imported {count} products', 'success')
+        return redirect(url_for('main.index'))
+
+    return render_template('import_products.html')
@@ -0,0 +1,23 @@
+import gc
+import os
+
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Load the app (and preloaded heavy modules) once in the master, then fork.
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything imported so far into the permanent generation so the
+    # garbage collector doesn't touch (and un-share) those pages in workers.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Never share pooled DB connections across processes.
+    from models import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
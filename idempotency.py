@@ -0,0 +1,141 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, jsonify, make_response, current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FORM_FIELD = 'idempotency_key'
+DEFAULT_TTL_HOURS = 24
+# A claimed key with no response after this long belongs to a request whose
+# worker died (2x gunicorn's default 30s timeout); it may be taken over.
+DEFAULT_LEASE_SECONDS = 60
+
+
+def _get_key():
+    key = request.headers.get(IDEMPOTENCY_HEADER) or request.form.get(IDEMPOTENCY_FORM_FIELD)
+    return key.strip()[:100] if key else None
+
+
+def _request_hash():
+    h = hashlib.sha256()
+    h.update(request.method.encode())
+    h.update(request.path.encode())
+    h.update(request.get_data())
+    return h.hexdigest()
+
+
+def _ttl():
+    return timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', DEFAULT_TTL_HOURS))
+
+
+def _lease():
+    return timedelta(seconds=current_app.config.get('IDEMPOTENCY_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+
+
+def _take_over(record):
+    """
+    Re-claim an in-progress key whose lease has run out. The conditional
+    UPDATE means only one retry can win it. Returns False while the original
+    request may still be running.
+    """
+    now = datetime.utcnow()
+    table = IdempotencyKey.__table__
+    result = db.session.execute(
+        table.update()
+        .where(table.c.id == record.id, table.c.status_code.is_(None), table.c.created_at < now - _lease())
+        .values(created_at=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def purge_expired_keys():
+    """Delete idempotency keys older than the configured TTL. Returns the number removed."""
+    cutoff = datetime.utcnow() - _ttl()
+    removed = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def _replay(record):
+    resp = make_response(record.response_body or '', record.status_code)
+    if record.content_type:
+        resp.content_type = record.content_type
+    if record.location:
+        resp.headers['Location'] = record.location
+    resp.headers['Idempotent-Replayed'] = 'true'
+    return resp
+
+
+def idempotent(view):
+    """
+    Make a POST endpoint safe to retry.
+    - Clients send an `Idempotency-Key` header (or `idempotency_key` form field).
+    - The first request is processed and its response stored against the key.
+    - Replays with the same key and body get the stored response without reprocessing.
+    - Requests without a key behave exactly as before.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = _get_key()
+        if not key:
+            return view(*args, **kwargs)
+
+        endpoint = request.endpoint
+        req_hash = _request_hash()
+        cutoff = datetime.utcnow() - _ttl()
+
+        record = IdempotencyKey.query.filter_by(key=key, endpoint=endpoint).first()
+        if record and record.created_at < cutoff:
+            db.session.delete(record)
+            db.session.commit()
+            record = None
+
+        if record:
+            if record.request_hash != req_hash:
+                return jsonify({'error': 'Idempotency key reused with a different request'}), 422
+            if record.status_code is not None:
+                return _replay(record)
+            # Still in progress, unless the worker handling it was killed
+            if not _take_over(record):
+                return jsonify({'error': 'A request with this idempotency key is still in progress'}), 409
+            record_id = record.id
+        else:
+            # Claim the key before doing any work; the unique constraint stops a
+            # concurrent duplicate (e.g. a double-click) from claiming it too.
+            record = IdempotencyKey(key=key, endpoint=endpoint, request_hash=req_hash)
+            db.session.add(record)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                return jsonify({'error': 'A request with this idempotency key is still in progress'}), 409
+            record_id = record.id
+
+        try:
+            resp = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(id=record_id).delete()
+            db.session.commit()
+            raise
+
+        if resp.status_code >= 500:
+            # Server errors are not stored so the client can retry with the same key
+            IdempotencyKey.query.filter_by(id=record_id).delete()
+        else:
+            record = IdempotencyKey.query.get(record_id)
+            record.status_code = resp.status_code
+            record.content_type = resp.content_type
+            record.location = resp.headers.get('Location')
+            record.response_body = resp.get_data(as_text=True)
+        db.session.commit()
+
+        purge_expired_keys()
+        return resp
+
+    return wrapper
@@ -1,17 +1,26 @@
 import os
 import platform
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib.units import mm
 
 from models import Sale, SaleItem, Product, db
+from cache import get_shop_info, get_setting
 
-def format_invoice_no(n):
-    return f"INV-{n:04d}"
+# reportlab is imported inside generate_invoice_pdf so that importing this
+# module (e.g. for format_invoice_no) does not pull in the PDF toolkit.
+
+def format_invoice_no(n, store_code=None):
+    prefix = get_setting('invoice_prefix', 'INV')
+    if store_code:
+        # Numbering restarts per store, so the store code keeps invoice numbers unique
+        return f"{prefix}-{store_code}-{n:04d}"
+    return f"{prefix}-{n:04d}"
 
 def generate_invoice_pdf(sale_id, out_path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+    from reportlab.lib.units import mm
+
     sale = Sale.query.get(sale_id)
     items = SaleItem.query.filter_by(sale_id=sale_id).all()
 
@@ -19,16 +28,17 @@ def generate_invoice_pdf(sale_id, out_path):
     width, height = A4
 
     # --- HEADER ---
-    logo_path = "static/logo.png"
+    shop = get_shop_info()
+    logo_path = os.path.join("static", (shop and shop.logo_filename) or "logo.png")
     if os.path.exists(logo_path):
         c.drawImage(logo_path, 20*mm, height-40*mm, width=25*mm, height=25*mm, preserveAspectRatio=True, mask='auto')
 
     c.setFont('Helvetica-Bold', 16)
-    c.drawString(50*mm, height-20*mm, "Patidar Traders")
+    c.drawString(50*mm, height-20*mm, (shop and shop.shop_name) or "Patidar Traders")
     c.setFont('Helvetica', 10)
-    c.drawString(50*mm, height-26*mm, "Mugaliya")
-    c.drawString(50*mm, height-32*mm, "Phone: 1234567890")
-    c.drawString(50*mm, height-38*mm, "GSTIN: GSTN000001")
+    c.drawString(50*mm, height-26*mm, (shop and shop.address) or "Mugaliya")
+    c.drawString(50*mm, height-32*mm, f"Phone: {(shop and shop.phone) or '1234567890'}")
+    c.drawString(50*mm, height-38*mm, f"GSTIN: {(shop and shop.gstin) or 'GSTN000001'}")
 
     # Invoice info
     c.setFont('Helvetica-Bold', 12)
@@ -36,27 +46,47 @@ def generate_invoice_pdf(sale_id, out_path):
     c.setFont('Helvetica', 10)
     c.drawRightString(width-20*mm, height-26*mm, f"Date: {sale.created_at.strftime('%Y-%m-%d')}")
     c.drawRightString(width-20*mm, height-32*mm, f"Customer: {sale.customer_name}")
+    y = height-38*mm
+    if sale.buyer_gstin:
+        c.drawRightString(width-20*mm, y, f"Buyer GSTIN: {sale.buyer_gstin}")
+        y -= 6*mm
+    if sale.place_of_supply:
+        c.drawRightString(width-20*mm, y, f"Place of Supply: {sale.place_of_supply}")
 
     # --- TABLE ---
-    data = [["Item", "Qty", "Price", "Total"]]
+    # Amounts are the tax values stored on the sale, never recomputed here
+    data = [["Item", "HSN", "Qty", "Price", "Taxable", "GST %", "Tax", "Total"]]
     for si in items:
         p = Product.query.get(si.product_id)
         name = p.name if p else str(si.product_id)
         data.append([
-            name[:40],
+            name[:28],
+            si.hsn_code or "",
             str(si.qty),
             f"{si.price:.2f}",
-            f"{si.qty * si.price:.2f}"
+            f"{si.taxable_value:.2f}",
+            f"{si.gst_rate:g}",
+            f"{si.cgst + si.sgst + si.igst:.2f}",
+            f"{si.line_total:.2f}"
         ])
-    data.append(["", "", "Grand Total", f"{sale.total:.2f}"])
-
-    table = Table(data, colWidths=[90*mm, 20*mm, 30*mm, 30*mm])
+    summary = [("Taxable Value", sale.taxable_total)]
+    if sale.is_interstate:
+        summary.append(("IGST", sale.igst_total))
+    else:
+        summary += [("CGST", sale.cgst_total), ("SGST", sale.sgst_total)]
+    summary.append(("Grand Total", sale.total))
+    for label, amount in summary:
+        data.append(["", "", "", "", "", "", label, f"{amount:.2f}"])
+
+    n_summary = len(summary)
+    table = Table(data, colWidths=[50*mm, 18*mm, 12*mm, 18*mm, 20*mm, 14*mm, 20*mm, 20*mm])
     table.setStyle(TableStyle([
         ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold'),
         ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
         ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('ALIGN', (1, 1), (-1, -2), 'CENTER'),
-        ('ALIGN', (2, -1), (-1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (1, 1), (-1, -n_summary - 1), 'CENTER'),
+        ('ALIGN', (6, -n_summary), (-1, -1), 'RIGHT'),
         ('FONT', (0, -1), (-1, -1), 'Helvetica-Bold'),
     ]))
 
@@ -0,0 +1,58 @@
+"""api sync columns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 18:48:35.104917
+
+updated_at is backfilled on existing products, sales and payments (the
+API cursor is built from it).
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+product = sa.table('product', sa.column('updated_at', sa.DateTime))
+sale = sa.table('sale', sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+payment = sa.table('payment', sa.column('payment_date', sa.DateTime), sa.column('updated_at', sa.DateTime))
+
+
+def upgrade():
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_payment_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_product_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_sale_updated_at'), ['updated_at'], unique=False)
+
+    now = datetime.utcnow()
+    op.execute(product.update().values(updated_at=now))
+    op.execute(sale.update().values(updated_at=sa.func.coalesce(sale.c.created_at, now)))
+    op.execute(payment.update().values(updated_at=sa.func.coalesce(payment.c.payment_date, now)))
+
+
+def downgrade():
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sale_updated_at'))
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_updated_at'))
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_payment_updated_at'))
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,36 @@
+"""typed settings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 18:48:36.517630
+
+Existing settings are typed 'str'.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shop_setting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('value_type', sa.String(length=10), nullable=False, server_default='str'))
+        batch_op.alter_column('value',
+               existing_type=sa.VARCHAR(length=256),
+               type_=sa.Text(),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('shop_setting', schema=None) as batch_op:
+        batch_op.alter_column('value',
+               existing_type=sa.Text(),
+               type_=sa.VARCHAR(length=256),
+               existing_nullable=True)
+        batch_op.drop_column('value_type')
@@ -0,0 +1,107 @@
+"""customer master
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 18:48:37.863078
+
+Sales recorded before the customer master existed are linked to a
+Customer by name (one customer per distinct trimmed customer_name), and
+each customer's balance is set to the outstanding due of those sales.
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+customer = sa.Table('customer', sa.MetaData(), sa.Column('id', sa.Integer, primary_key=True),
+                    sa.Column('name', sa.String), sa.Column('balance', sa.Float),
+                    sa.Column('created_at', sa.DateTime), sa.Column('updated_at', sa.DateTime))
+sale = sa.table('sale', sa.column('id', sa.Integer), sa.column('customer_id', sa.Integer),
+                sa.column('customer_name', sa.String), sa.column('total', sa.Float),
+                sa.column('created_at', sa.DateTime))
+payment = sa.table('payment', sa.column('sale_id', sa.Integer), sa.column('amount', sa.Float))
+
+
+def upgrade():
+    op.create_table('customer',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('address', sa.String(length=200), nullable=True),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_customer_name'), ['name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_customer_phone'), ['phone'], unique=True)
+        batch_op.create_index(batch_op.f('ix_customer_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_payment_sale_id'), ['sale_id'], unique=False)
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('customer_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_sale_customer_created', ['customer_id', 'created_at'], unique=False)
+        batch_op.create_foreign_key('fk_sale_customer_id_customer', 'customer', ['customer_id'], ['id'])
+
+    backfill_customers()
+
+
+def backfill_customers():
+    """Create a customer per distinct sale customer_name and link the sales to it."""
+    conn = op.get_bind()
+    paid = (
+        sa.select(payment.c.sale_id, sa.func.sum(payment.c.amount).label('paid'))
+        .group_by(payment.c.sale_id)
+        .subquery()
+    )
+    rows = conn.execute(
+        sa.select(sale.c.id, sale.c.customer_name, sale.c.total, sale.c.created_at,
+                  sa.func.coalesce(paid.c.paid, 0).label('paid'))
+        .outerjoin(paid, paid.c.sale_id == sale.c.id)
+        .where(sale.c.customer_name.isnot(None))
+        .order_by(sale.c.id)
+    ).all()
+
+    customers = {}
+    for r in rows:
+        name = r.customer_name.strip()
+        if not name:
+            continue
+        c = customers.setdefault(name, {'sale_ids': [], 'balance': 0, 'created_at': r.created_at})
+        c['sale_ids'].append(r.id)
+        c['balance'] += max(r.total - r.paid, 0)
+
+    now = datetime.utcnow()
+    for name, c in customers.items():
+        customer_id = conn.execute(customer.insert().values(
+            name=name, balance=round(c['balance'], 2), created_at=c['created_at'] or now, updated_at=now,
+        )).inserted_primary_key[0]
+        conn.execute(sale.update().where(sale.c.id.in_(c['sale_ids'])).values(customer_id=customer_id))
+
+
+def downgrade():
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_sale_customer_id_customer', type_='foreignkey')
+        batch_op.drop_index('ix_sale_customer_created')
+        batch_op.drop_column('customer_id')
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_payment_sale_id'))
+
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customer_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_customer_phone'))
+        batch_op.drop_index(batch_op.f('ix_customer_name'))
+
+    op.drop_table('customer')
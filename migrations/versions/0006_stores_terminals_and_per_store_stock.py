@@ -0,0 +1,142 @@
+"""stores, terminals and per-store stock
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:48:59.579640
+
+Existing data moves into the default store (MAIN): each product's
+quantity becomes its MAIN StoreStock row and every sale is assigned to
+MAIN, before product.quantity is dropped and sale.store_id made NOT NULL.
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+DEFAULT_STORE_CODE = 'MAIN'
+
+store = sa.table('store', sa.column('id', sa.Integer), sa.column('code', sa.String),
+                 sa.column('name', sa.String), sa.column('address', sa.String), sa.column('phone', sa.String),
+                 sa.column('is_active', sa.Boolean), sa.column('created_at', sa.DateTime))
+store_stock = sa.table('store_stock', sa.column('store_id', sa.Integer), sa.column('product_id', sa.Integer),
+                       sa.column('quantity', sa.Integer), sa.column('updated_at', sa.DateTime))
+product = sa.table('product', sa.column('id', sa.Integer), sa.column('quantity', sa.Integer))
+sale = sa.table('sale', sa.column('store_id', sa.Integer))
+shop_info = sa.table('shop_info', sa.column('shop_name', sa.String), sa.column('address', sa.String),
+                     sa.column('phone', sa.String))
+
+
+def upgrade():
+    op.create_table('store',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('address', sa.String(length=200), nullable=True),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    op.create_table('invoice_sequence',
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('last_no', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['store.id'], ),
+    sa.PrimaryKeyConstraint('store_id')
+    )
+    op.create_table('store_stock',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['store_id'], ['store.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('store_id', 'product_id', name='uq_store_stock_store_product')
+    )
+    with op.batch_alter_table('store_stock', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_store_stock_product_id'), ['product_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_store_stock_updated_at'), ['updated_at'], unique=False)
+
+    op.create_table('terminal',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['store.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('store_id', 'name', name='uq_terminal_store_name')
+    )
+    with op.batch_alter_table('terminal', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_terminal_store_id'), ['store_id'], unique=False)
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('store_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('terminal_id', sa.Integer(), nullable=True))
+
+    # Default store (same values stores.ensure_default_store would use)
+    conn = op.get_bind()
+    now = datetime.utcnow()
+    shop = conn.execute(sa.select(shop_info.c.shop_name, shop_info.c.address, shop_info.c.phone)).first()
+    conn.execute(store.insert().values(
+        code=DEFAULT_STORE_CODE, name=(shop and shop.shop_name) or 'Main Store',
+        address=shop.address if shop else None, phone=shop.phone if shop else None,
+        is_active=True, created_at=now,
+    ))
+    store_id = conn.execute(sa.select(store.c.id).where(store.c.code == DEFAULT_STORE_CODE)).scalar_one()
+
+    # Stock and sales so far all belong to the default store
+    conn.execute(store_stock.insert().from_select(
+        ['store_id', 'product_id', 'quantity', 'updated_at'],
+        sa.select(sa.literal(store_id), product.c.id, sa.func.coalesce(product.c.quantity, 0), sa.literal(now)),
+    ))
+    conn.execute(sale.update().values(store_id=store_id))
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_column('quantity')
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.alter_column('store_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_sale_store_created', ['store_id', 'created_at'], unique=False)
+        batch_op.create_foreign_key('fk_sale_terminal_id_terminal', 'terminal', ['terminal_id'], ['id'])
+        batch_op.create_foreign_key('fk_sale_store_id_store', 'store', ['store_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_sale_store_id_store', type_='foreignkey')
+        batch_op.drop_constraint('fk_sale_terminal_id_terminal', type_='foreignkey')
+        batch_op.drop_index('ix_sale_store_created')
+        batch_op.drop_column('terminal_id')
+        batch_op.drop_column('store_id')
+
+    # Stock collapses back into one quantity per product, summed across stores
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quantity', sa.INTEGER(), nullable=False, server_default='0'))
+    op.get_bind().execute(product.update().values(quantity=sa.func.coalesce(
+        sa.select(sa.func.sum(store_stock.c.quantity))
+        .where(store_stock.c.product_id == product.c.id)
+        .scalar_subquery(),
+        0,
+    )))
+
+    with op.batch_alter_table('terminal', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_terminal_store_id'))
+
+    op.drop_table('terminal')
+    with op.batch_alter_table('store_stock', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_store_stock_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_store_stock_product_id'))
+
+    op.drop_table('store_stock')
+    op.drop_table('invoice_sequence')
+    op.drop_table('store')
@@ -0,0 +1,137 @@
+"""gst tax columns and decimal money
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 18:50:27.236741
+
+Money columns become Numeric(12,2). Sales recorded before tax was stored
+carry no GST breakdown: their lines are backfilled at a 0% rate with the
+taxable value equal to the line amount, so invoice totals are unchanged.
+Their buyer_gstin stays NULL, so they report as B2C.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+sale = sa.table('sale', sa.column('total', sa.Numeric), sa.column('taxable_total', sa.Numeric))
+sale_item = sa.table('sale_item', sa.column('qty', sa.Integer), sa.column('price', sa.Numeric),
+                     sa.column('taxable_value', sa.Numeric), sa.column('line_total', sa.Numeric))
+
+
+def upgrade():
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gstin', sa.String(length=15), nullable=True))
+        batch_op.alter_column('balance',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+        batch_op.create_index(batch_op.f('ix_customer_gstin'), ['gstin'], unique=False)
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.alter_column('amount',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hsn_code', sa.String(length=8), nullable=True))
+        batch_op.add_column(sa.Column('gst_rate', sa.Numeric(precision=5, scale=2), nullable=False, server_default='0'))
+        batch_op.alter_column('cost_price',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+        batch_op.alter_column('selling_price',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('buyer_gstin', sa.String(length=15), nullable=True))
+        batch_op.add_column(sa.Column('place_of_supply', sa.String(length=2), nullable=True))
+        batch_op.add_column(sa.Column('is_interstate', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('taxable_total', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('cgst_total', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('sgst_total', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('igst_total', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.alter_column('total',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+
+    with op.batch_alter_table('sale_item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hsn_code', sa.String(length=8), nullable=True))
+        batch_op.add_column(sa.Column('gst_rate', sa.Numeric(precision=5, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('taxable_value', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('cgst', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('sgst', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('igst', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('line_total', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'))
+        batch_op.alter_column('price',
+               existing_type=sa.FLOAT(),
+               type_=sa.Numeric(precision=12, scale=2),
+               existing_nullable=False)
+
+    line_amount = sa.func.round(sale_item.c.qty * sale_item.c.price, 2)
+    op.execute(sale_item.update().values(taxable_value=line_amount, line_total=line_amount))
+    op.execute(sale.update().values(taxable_total=sale.c.total))
+
+
+def downgrade():
+    with op.batch_alter_table('sale_item', schema=None) as batch_op:
+        batch_op.alter_column('price',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+        batch_op.drop_column('line_total')
+        batch_op.drop_column('igst')
+        batch_op.drop_column('sgst')
+        batch_op.drop_column('cgst')
+        batch_op.drop_column('taxable_value')
+        batch_op.drop_column('gst_rate')
+        batch_op.drop_column('hsn_code')
+
+    with op.batch_alter_table('sale', schema=None) as batch_op:
+        batch_op.alter_column('total',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+        batch_op.drop_column('igst_total')
+        batch_op.drop_column('sgst_total')
+        batch_op.drop_column('cgst_total')
+        batch_op.drop_column('taxable_total')
+        batch_op.drop_column('is_interstate')
+        batch_op.drop_column('place_of_supply')
+        batch_op.drop_column('buyer_gstin')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.alter_column('selling_price',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+        batch_op.alter_column('cost_price',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+        batch_op.drop_column('gst_rate')
+        batch_op.drop_column('hsn_code')
+
+    with op.batch_alter_table('payment', schema=None) as batch_op:
+        batch_op.alter_column('amount',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customer_gstin'))
+        batch_op.alter_column('balance',
+               existing_type=sa.Numeric(precision=12, scale=2),
+               type_=sa.FLOAT(),
+               existing_nullable=False)
+        batch_op.drop_column('gstin')
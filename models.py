@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
 from flask_login import UserMixin
 
@@ -10,14 +11,53 @@ class User(db.Model, UserMixin):
     password_hash = db.Column(db.String(200), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
+class Store(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(200))
+    phone = db.Column(db.String(50))
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    terminals = db.relationship('Terminal', backref='store', lazy='dynamic')
+
+class Terminal(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False, index=True)
+    name = db.Column(db.String(50), nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+
+    __table_args__ = (db.UniqueConstraint('store_id', 'name', name='uq_terminal_store_name'),)
+
+class StoreStock(db.Model):
+    # One row per (store, product): checkouts in one store never touch
+    # another store's rows.
+    id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (db.UniqueConstraint('store_id', 'product_id', name='uq_store_stock_store_product'),)
+
+class InvoiceSequence(db.Model):
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), primary_key=True)
+    last_no = db.Column(db.Integer, nullable=False, default=0)
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50))
-    cost_price = db.Column(db.Float, nullable=False)
-    selling_price = db.Column(db.Float, nullable=False)
-    quantity = db.Column(db.Integer, nullable=False)
+    cost_price = db.Column(db.Numeric(12, 2), nullable=False)
+    selling_price = db.Column(db.Numeric(12, 2), nullable=False)
+    hsn_code = db.Column(db.String(8))
+    gst_rate = db.Column(db.Numeric(5, 2), nullable=False, default=0)
+    # Stock lives in StoreStock; queries load the current store's level with
+    # with_expression(Product.quantity, stores.stock_expr(store_id)).
+    quantity = db.query_expression(default_expr=db.literal(0))
     low_stock_threshold = db.Column(db.Integer, default=5)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
 
 class SaleItem(db.Model):
@@ -25,12 +65,22 @@ class SaleItem(db.Model):
     sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'))
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'))
     qty = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Numeric(12, 2), nullable=False)
+    # Tax computed once at sale time (see tax.compute_line) and never recomputed
+    hsn_code = db.Column(db.String(8))
+    gst_rate = db.Column(db.Numeric(5, 2), nullable=False, default=0)
+    taxable_value = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    cgst = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    sgst = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    igst = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    line_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
 
 class ShopSetting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(64), unique=True, nullable=False)
-    value = db.Column(db.String(256))
+    value = db.Column(db.Text)
+    # str | int | float | bool | json, see cache.SETTINGS
+    value_type = db.Column(db.String(10), default='str', nullable=False)
 
 class ShopInfo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -40,16 +90,47 @@ class ShopInfo(db.Model):
     gstin = db.Column(db.String(50), default="GSTN000001")
     logo_filename = db.Column(db.String(100), default="logo.png")
 
+class Customer(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False, index=True)
+    phone = db.Column(db.String(20), unique=True, index=True)
+    address = db.Column(db.String(200))
+    gstin = db.Column(db.String(15), index=True)
+    # Outstanding due across all sales, maintained on every sale/payment
+    balance = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    sales = db.relationship('Sale', backref='customer', lazy='dynamic')
+
 class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     invoice_no = db.Column(db.String(20), unique=True, nullable=False)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
+    terminal_id = db.Column(db.Integer, db.ForeignKey('terminal.id'))
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'))
     customer_name = db.Column(db.String(200))
-    total = db.Column(db.Float, nullable=False)
+    # Buyer's GSTIN as of this sale (B2B when set); the customer's GSTIN may change later
+    buyer_gstin = db.Column(db.String(15))
+    # Two-digit state code; IGST applies when it differs from the shop's state
+    place_of_supply = db.Column(db.String(2))
+    is_interstate = db.Column(db.Boolean, nullable=False, default=False)
+    taxable_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    cgst_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    sgst_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    igst_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total = db.Column(db.Numeric(12, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationship to payments
     payments = db.relationship('Payment', backref='sale', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_sale_store_created', 'store_id', 'created_at'),
+        db.Index('ix_sale_customer_created', 'customer_id', 'created_at'),
+    )
+
     # Computed property: total paid amount
     @property
     def paid_amount(self):
@@ -62,8 +143,29 @@ class Sale(db.Model):
 
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'), nullable=False, index=True)
+    amount = db.Column(db.Numeric(12, 2), nullable=False)
     payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
+# A new payment changes the sale's paid/due amounts, so bump the sale's
+# updated_at for API clients doing delta sync.
+@event.listens_for(Payment, 'after_insert')
+def _touch_sale_on_payment(mapper, connection, target):
+    connection.execute(
+        Sale.__table__.update().where(Sale.__table__.c.id == target.sale_id).values(updated_at=datetime.utcnow())
+    )
+
+class IdempotencyKey(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL status_code means the original request is still being processed
+    status_code = db.Column(db.Integer)
+    content_type = db.Column(db.String(100))
+    location = db.Column(db.String(500))
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (db.UniqueConstraint('key', 'endpoint', name='uq_idempotency_key_endpoint'),)
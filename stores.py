@@ -0,0 +1,174 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import click
+from flask import Blueprint, g, session, request, redirect, url_for, flash, jsonify
+from flask_login import login_required
+from sqlalchemy import select, func
+from sqlalchemy.orm import with_expression
+
+from models import db, Store, Terminal, StoreStock, InvoiceSequence, Product, ShopInfo
+from cache import settings_cache
+
+stores_bp = Blueprint('stores', __name__, url_prefix='/stores')
+
+DEFAULT_STORE_CODE = 'MAIN'
+
+# -------------------------
+# Current store / terminal
+# -------------------------
+def ensure_default_store():
+    """Create the default store on a fresh database. Returns the first store."""
+    store = Store.query.order_by(Store.id).first()
+    if not store:
+        shop = ShopInfo.query.first()
+        store = Store(code=DEFAULT_STORE_CODE, name=shop.shop_name if shop else 'Main Store',
+                      address=shop.address if shop else None, phone=shop.phone if shop else None)
+        db.session.add(store)
+        db.session.commit()
+    return store
+
+def get_stores():
+    """Cached list of active stores with their terminals (plain objects, safe across requests)."""
+    def load():
+        ensure_default_store()
+        stores = Store.query.filter_by(is_active=True).order_by(Store.id).all()
+        terminals = Terminal.query.filter_by(is_active=True).order_by(Terminal.id).all()
+        return [SimpleNamespace(
+            id=s.id, code=s.code, name=s.name,
+            terminals=[SimpleNamespace(id=t.id, name=t.name) for t in terminals if t.store_id == s.id],
+        ) for s in stores]
+    return settings_cache.get('stores', load)
+
+def get_store(code):
+    return next((s for s in get_stores() if s.code == code), None)
+
+def get_current_store():
+    """The store selected in this session, falling back to the first active store."""
+    if 'current_store' not in g:
+        stores = get_stores()
+        store_id = session.get('store_id')
+        g.current_store = next((s for s in stores if s.id == store_id), stores[0] if stores else None)
+    return g.current_store
+
+def get_current_terminal_id():
+    store = get_current_store()
+    terminal_id = session.get('terminal_id')
+    if store and any(t.id == terminal_id for t in store.terminals):
+        return terminal_id
+    return None
+
+# -------------------------
+# Stock
+# -------------------------
+def stock_expr(store_id):
+    """Correlated expression for a product's stock in one store (0 when it has no row)."""
+    return func.coalesce(
+        select(StoreStock.quantity)
+        .where(StoreStock.store_id == store_id, StoreStock.product_id == Product.id)
+        .scalar_subquery(),
+        0,
+    )
+
+def products_with_stock(store_id, query=None):
+    """Product query with Product.quantity loaded for the given store."""
+    query = query if query is not None else Product.query
+    return query.options(with_expression(Product.quantity, stock_expr(store_id)))
+
+def set_stock(store_id, product_id, quantity):
+    row = StoreStock.query.filter_by(store_id=store_id, product_id=product_id).first()
+    if row:
+        row.quantity = quantity
+    else:
+        row = StoreStock(store_id=store_id, product_id=product_id, quantity=quantity)
+        db.session.add(row)
+    return row
+
+def take_stock(store_id, product_id, qty):
+    """
+    Decrement one store's stock in a single conditional UPDATE.
+    Returns False (and changes nothing) if there isn't enough stock. Only
+    that store's row is written, so other stores' checkouts don't contend.
+    """
+    table = StoreStock.__table__
+    result = db.session.execute(
+        table.update()
+        .where(table.c.store_id == store_id, table.c.product_id == product_id, table.c.quantity >= qty)
+        .values(quantity=table.c.quantity - qty, updated_at=datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+# -------------------------
+# Invoice numbers
+# -------------------------
+def next_invoice_number(store_id):
+    """Next number in the store's own invoice sequence (part of the caller's transaction)."""
+    table = InvoiceSequence.__table__
+    updated = db.session.execute(
+        table.update().where(table.c.store_id == store_id).values(last_no=table.c.last_no + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(InvoiceSequence(store_id=store_id, last_no=1))
+        db.session.flush()
+        return 1
+    return db.session.execute(select(table.c.last_no).where(table.c.store_id == store_id)).scalar_one()
+
+# -------------------------
+# Routes
+# -------------------------
+@stores_bp.app_context_processor
+def inject_store():
+    return {'current_store': get_current_store, 'stores': get_stores}
+
+@stores_bp.route('')
+@login_required
+def list_stores():
+    return jsonify([{
+        'id': s.id, 'code': s.code, 'name': s.name,
+        'terminals': [{'id': t.id, 'name': t.name} for t in s.terminals],
+    } for s in get_stores()])
+
+@stores_bp.route('/select', methods=['POST'])
+@login_required
+def select_store():
+    store_id = request.form.get('store_id', type=int)
+    store = next((s for s in get_stores() if s.id == store_id), None)
+    if not store:
+        flash("Store not found!", "danger")
+        return redirect(request.referrer or url_for('main.index'))
+    session['store_id'] = store.id
+    terminal_id = request.form.get('terminal_id', type=int)
+    session['terminal_id'] = terminal_id if any(t.id == terminal_id for t in store.terminals) else None
+    flash(f"Now working in {store.name}", "success")
+    return redirect(request.referrer or url_for('main.index'))
+
+# -------------------------
+# CLI
+# -------------------------
+@stores_bp.cli.command('create')
+@click.argument('code')
+@click.argument('name')
+@click.option('--address')
+@click.option('--phone')
+def create_store_command(code, name, address, phone):
+    """Create a store identified by a short CODE (used in invoice numbers)."""
+    code = code.upper()
+    if Store.query.filter_by(code=code).first():
+        print(f"ℹ Store {code} already exists.")
+        return
+    db.session.add(Store(code=code, name=name, address=address, phone=phone))
+    db.session.commit()
+    print(f"✅ Store {code} created.")
+
+@stores_bp.cli.command('add-terminal')
+@click.argument('code')
+@click.argument('name')
+def add_terminal_command(code, name):
+    """Add a checkout terminal NAME to the store CODE."""
+    store = Store.query.filter_by(code=code.upper()).first()
+    if not store:
+        print(f"❌ Store {code} not found.")
+        return
+    db.session.add(Terminal(store_id=store.id, name=name))
+    db.session.commit()
+    print(f"✅ Terminal '{name}' added to {store.code}.")
@@ -0,0 +1,191 @@
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+from sqlalchemy import func, select
+
+from models import db, Sale, SaleItem
+from cache import get_shop_info, get_setting
+from stores import get_current_store
+
+gst_bp = Blueprint('gst', __name__, url_prefix='/gst')
+
+PAISE = Decimal('0.01')
+ZERO = Decimal('0.00')
+GST_RATES = (Decimal('0'), Decimal('0.25'), Decimal('3'), Decimal('5'), Decimal('12'), Decimal('18'), Decimal('28'))
+
+# Two-digit GST state/UT codes (01-38) plus 97 for Other Territory
+STATE_CODES = frozenset([f'{n:02d}' for n in range(1, 39)] + ['97'])
+
+LineTax = namedtuple('LineTax', 'taxable_value cgst sgst igst line_total')
+
+# -------------------------
+# Money helpers
+# -------------------------
+def to_money(value):
+    """Decimal rounded to paise. Raises ValueError for anything that isn't a number."""
+    if value is None or value == '':
+        return ZERO
+    try:
+        return Decimal(str(value)).quantize(PAISE, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+
+def to_rate(value):
+    try:
+        rate = Decimal(str(value or 0))
+    except InvalidOperation:
+        raise ValueError(f"Invalid GST rate: {value!r}")
+    if rate < 0 or rate > 100:
+        raise ValueError(f"Invalid GST rate: {value!r}")
+    return rate
+
+# -------------------------
+# Tax computation
+# -------------------------
+def state_code(gstin):
+    """The two-digit state code at the start of a GSTIN, or None."""
+    code = (gstin or '').strip()[:2]
+    return code if code in STATE_CODES else None
+
+def parse_gstin(value):
+    """A GSTIN: 15 letters/digits starting with a state code (None if blank). Raises ValueError."""
+    if value is None or str(value).strip() == '':
+        return None
+    gstin = str(value).strip().upper()
+    if len(gstin) != 15 or not (gstin.isascii() and gstin.isalnum()) or not state_code(gstin):
+        raise ValueError(f"Invalid GSTIN: {value!r} (expected 15 characters starting with a GST state code)")
+    return gstin
+
+def parse_place_of_supply(value):
+    """A place of supply given as a two-digit state code (None if blank). Raises ValueError."""
+    if value is None or str(value).strip() == '':
+        return None
+    code = str(value).strip()
+    if code not in STATE_CODES:
+        raise ValueError(f"Invalid place of supply: {value!r} (expected a two-digit GST state code)")
+    return code
+
+def is_interstate(place_of_supply):
+    """IGST applies when the place of supply is a different state from the shop's."""
+    shop = get_shop_info()
+    shop_state = state_code(shop.gstin if shop else None)
+    return bool(shop_state and place_of_supply and place_of_supply != shop_state)
+
+def compute_line(price, qty, rate, interstate=False, inclusive=None):
+    """
+    Tax for one invoice line, rounded to paise once here and stored.
+    - inclusive: `price` already includes GST (the `prices_include_tax` setting by default).
+    - CGST/SGST split a line's tax in half; CGST takes the odd paisa so they always sum exactly.
+    """
+    if inclusive is None:
+        inclusive = get_setting('prices_include_tax')
+    gross = to_money(Decimal(str(price)) * qty)
+    rate = to_rate(rate)
+    if inclusive:
+        taxable = (gross * 100 / (100 + rate)).quantize(PAISE, rounding=ROUND_HALF_UP)
+        tax = gross - taxable
+    else:
+        taxable = gross
+        tax = (taxable * rate / 100).quantize(PAISE, rounding=ROUND_HALF_UP)
+
+    if interstate:
+        cgst = sgst = ZERO
+        igst = tax
+    else:
+        cgst = (tax / 2).quantize(PAISE, rounding=ROUND_HALF_UP)
+        sgst = tax - cgst
+        igst = ZERO
+    return LineTax(taxable, cgst, sgst, igst, taxable + tax)
+
+def apply_line_tax(sale_item, line):
+    sale_item.taxable_value = line.taxable_value
+    sale_item.cgst = line.cgst
+    sale_item.sgst = line.sgst
+    sale_item.igst = line.igst
+    sale_item.line_total = line.line_total
+
+def apply_invoice_totals(sale, lines):
+    """Invoice totals are exact sums of the stored line amounts."""
+    sale.taxable_total = sum((l.taxable_value for l in lines), ZERO)
+    sale.cgst_total = sum((l.cgst for l in lines), ZERO)
+    sale.sgst_total = sum((l.sgst for l in lines), ZERO)
+    sale.igst_total = sum((l.igst for l in lines), ZERO)
+    sale.total = sum((l.line_total for l in lines), ZERO)
+
+# -------------------------
+# GSTR-1 summaries
+# -------------------------
+def _month_range(month):
+    start = datetime.strptime(month, '%Y-%m')
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start, end
+
+def _tax_columns():
+    return (
+        func.sum(SaleItem.taxable_value).label('taxable_value'),
+        func.sum(SaleItem.cgst).label('cgst'),
+        func.sum(SaleItem.sgst).label('sgst'),
+        func.sum(SaleItem.igst).label('igst'),
+        func.sum(SaleItem.line_total).label('total'),
+    )
+
+def gstr1_summary(month, store_id=None):
+    """
+    GSTR-1 style month summary built from the stored line taxes with three
+    grouped queries (B2B invoices, B2C by place of supply and rate, HSN).
+    """
+    start, end = _month_range(month)
+    in_month = [Sale.created_at >= start, Sale.created_at < end]
+    if store_id:
+        in_month.append(Sale.store_id == store_id)
+    # B2B by the GSTIN recorded on the invoice, not the customer's current one
+    registered = Sale.buyer_gstin.isnot(None)
+
+    b2b = db.session.execute(
+        select(Sale.buyer_gstin.label('gstin'), Sale.customer_name.label('name'), Sale.invoice_no,
+               Sale.created_at, Sale.place_of_supply, SaleItem.gst_rate, *_tax_columns())
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .where(*in_month, registered)
+        .group_by(Sale.id, Sale.buyer_gstin, Sale.customer_name, Sale.invoice_no, Sale.created_at,
+                  Sale.place_of_supply, SaleItem.gst_rate)
+        .order_by(Sale.created_at, SaleItem.gst_rate)
+    ).mappings().all()
+
+    b2cs = db.session.execute(
+        select(Sale.place_of_supply, Sale.is_interstate, SaleItem.gst_rate, *_tax_columns())
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .where(*in_month, ~registered)
+        .group_by(Sale.place_of_supply, Sale.is_interstate, SaleItem.gst_rate)
+        .order_by(Sale.place_of_supply, SaleItem.gst_rate)
+    ).mappings().all()
+
+    hsn = db.session.execute(
+        select(SaleItem.hsn_code, SaleItem.gst_rate, func.sum(SaleItem.qty).label('qty'), *_tax_columns())
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .where(*in_month)
+        .group_by(SaleItem.hsn_code, SaleItem.gst_rate)
+        .order_by(SaleItem.hsn_code, SaleItem.gst_rate)
+    ).mappings().all()
+
+    def rows(result):
+        return [{k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in r.items()} for r in result]
+
+    totals = {k: sum((r[k] or ZERO for r in hsn), ZERO) for k in ('taxable_value', 'cgst', 'sgst', 'igst', 'total')}
+    return {'month': month, 'b2b': rows(b2b), 'b2cs': rows(b2cs), 'hsn': rows(hsn), 'totals': totals}
+
+# -------------------------
+# Routes
+# -------------------------
+@gst_bp.route('/gstr1')
+@login_required
+def gstr1_report():
+    month = request.args.get('month') or datetime.utcnow().strftime('%Y-%m')
+    try:
+        _month_range(month)
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+    store_id = None if request.args.get('store') == 'all' else get_current_store().id
+    return jsonify(gstr1_summary(month, store_id))
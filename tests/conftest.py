@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from cache import settings_cache, user_cache  # noqa: E402
+from models import db, User, Product  # noqa: E402
+from stores import ensure_default_store, set_stock  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Invoice PDFs are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='admin', password_hash=generate_password_hash('admin'), is_admin=True))
+        db.session.commit()
+        # The caches are process-wide; don't carry entries over from another test's database
+        settings_cache.invalidate()
+        user_cache.invalidate()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
+
+
+@pytest.fixture
+def make_product(app):
+    """Create a product stocked in the default store; returns its id."""
+    store = ensure_default_store()
+
+    def make(name='Soap', price='10.00', stock=10, gst_rate=0, hsn_code=None):
+        product = Product(name=name, cost_price=1, selling_price=price, gst_rate=gst_rate, hsn_code=hsn_code)
+        db.session.add(product)
+        db.session.flush()
+        set_stock(store.id, product.id, stock)
+        db.session.commit()
+        return product.id
+    return make
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from customers import statement_query, aging_query
+from models import db, Customer, Sale, Payment
+from stores import ensure_default_store
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+def days_ago(n):
+    return NOW - timedelta(days=n)
+
+
+def add_sale(customer, invoice_no, total, created_at, payments=()):
+    sale = Sale(invoice_no=invoice_no, store_id=ensure_default_store().id, customer_id=customer.id,
+                customer_name=customer.name, total=Decimal(total), created_at=created_at)
+    db.session.add(sale)
+    db.session.flush()
+    for amount, paid_at in payments:
+        db.session.add(Payment(sale_id=sale.id, amount=Decimal(amount), payment_date=paid_at))
+    return sale
+
+
+def make_customer(name):
+    customer = Customer(name=name, balance=0)
+    db.session.add(customer)
+    db.session.flush()
+    return customer
+
+
+def test_statement_running_balance(app):
+    ravi = make_customer('Ravi')
+    add_sale(ravi, 'INV-1', '100.00', days_ago(90), payments=[('30.00', days_ago(80))])
+    add_sale(ravi, 'INV-2', '50.00', days_ago(45))
+    # Paid at the till: the sale is listed before its payment
+    add_sale(ravi, 'INV-3', '20.00', days_ago(5), payments=[('20.00', days_ago(5))])
+    db.session.commit()
+
+    rows = db.session.execute(statement_query(ravi.id)).mappings().all()
+
+    assert [(r['entry_type'], r['reference'], r['balance']) for r in rows] == [
+        ('sale', 'INV-1', Decimal('100.00')),
+        ('payment', 'INV-1', Decimal('70.00')),
+        ('sale', 'INV-2', Decimal('120.00')),
+        ('sale', 'INV-3', Decimal('140.00')),
+        ('payment', 'INV-3', Decimal('120.00')),
+    ]
+
+
+def test_statement_range_keeps_balance_from_earlier_history(app):
+    ravi = make_customer('Ravi')
+    add_sale(ravi, 'INV-1', '100.00', days_ago(90), payments=[('30.00', days_ago(80))])
+    add_sale(ravi, 'INV-2', '50.00', days_ago(45))
+    db.session.commit()
+
+    rows = db.session.execute(statement_query(ravi.id, date_from=days_ago(60))).mappings().all()
+
+    assert [(r['reference'], r['balance']) for r in rows] == [('INV-2', Decimal('120.00'))]
+
+
+def test_aging_buckets_outstanding_due_by_sale_age(app):
+    ravi = make_customer('Ravi')
+    add_sale(ravi, 'INV-1', '100.00', days_ago(90), payments=[('30.00', days_ago(80))])
+    add_sale(ravi, 'INV-2', '50.00', days_ago(45))
+    add_sale(ravi, 'INV-3', '20.00', days_ago(5))
+    settled = make_customer('Settled')
+    add_sale(settled, 'INV-4', '40.00', days_ago(10), payments=[('40.00', days_ago(10))])
+    db.session.commit()
+
+    rows = db.session.execute(aging_query(now=NOW)).mappings().all()
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row['name'] == 'Ravi'
+    assert (row['0-30'], row['31-60'], row['60+']) == (Decimal('20.00'), Decimal('50.00'), Decimal('70.00'))
+    assert row['total_due'] == Decimal('140.00')
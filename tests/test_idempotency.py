@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from models import db, Sale, IdempotencyKey
+
+
+def sale_body(product_id, qty=1):
+    return {'customer_name': 'Ravi', 'items': [{'product_id': product_id, 'quantity': qty}]}
+
+
+def test_replay_returns_stored_response_without_reprocessing(client, make_product):
+    pid = make_product()
+    first = client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+    second = client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.get_json() == first.get_json()
+    assert Sale.query.count() == 1
+
+
+def test_same_key_with_different_body_is_rejected(client, make_product):
+    pid = make_product()
+    client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+    resp = client.post('/create-sale', json=sale_body(pid, qty=2), headers={'Idempotency-Key': 'k1'})
+
+    assert resp.status_code == 422
+    assert Sale.query.count() == 1
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, make_product):
+    pid = make_product()
+    client.post('/create-sale', json=sale_body(pid))
+    client.post('/create-sale', json=sale_body(pid))
+
+    assert Sale.query.count() == 2
+
+
+def test_in_progress_key_conflicts_until_its_lease_expires(client, make_product):
+    pid = make_product()
+    client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+    # Simulate a worker killed mid-request: claimed, never answered
+    record = IdempotencyKey.query.filter_by(key='k1').one()
+    record.status_code = None
+    db.session.commit()
+
+    resp = client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+    assert resp.status_code == 409
+
+    record.created_at = datetime.utcnow() - timedelta(minutes=5)
+    db.session.commit()
+    resp = client.post('/create-sale', json=sale_body(pid), headers={'Idempotency-Key': 'k1'})
+    assert resp.status_code == 200
+    assert 'Idempotent-Replayed' not in resp.headers
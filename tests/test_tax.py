@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+from cache import set_setting
+from models import db
+from tax import compute_line, parse_gstin
+
+
+def test_exclusive_price_adds_tax_on_top():
+    line = compute_line('100.00', 2, 18, inclusive=False)
+
+    assert line.taxable_value == Decimal('200.00')
+    assert (line.cgst, line.sgst, line.igst) == (Decimal('18.00'), Decimal('18.00'), Decimal('0.00'))
+    assert line.line_total == Decimal('236.00')
+
+
+def test_inclusive_price_backs_tax_out_of_the_line_amount():
+    line = compute_line('118.00', 1, 18, inclusive=True)
+
+    assert line.taxable_value == Decimal('100.00')
+    assert line.cgst + line.sgst == Decimal('18.00')
+    assert line.line_total == Decimal('118.00')
+
+
+def test_odd_paisa_goes_to_cgst_and_halves_sum_exactly():
+    # 3 x 10.01 incl. 5%: taxable 28.60, tax 1.43
+    line = compute_line('10.01', 3, 5, inclusive=True)
+
+    assert line.taxable_value == Decimal('28.60')
+    assert line.cgst == Decimal('0.72')
+    assert line.sgst == Decimal('0.71')
+    assert line.taxable_value + line.cgst + line.sgst == line.line_total == Decimal('30.03')
+
+
+def test_interstate_line_is_all_igst():
+    line = compute_line('10.01', 3, 5, interstate=True, inclusive=True)
+
+    assert (line.cgst, line.sgst, line.igst) == (Decimal('0.00'), Decimal('0.00'), Decimal('1.43'))
+    assert line.line_total == Decimal('30.03')
+
+
+def test_inclusive_defaults_to_the_shop_setting(app):
+    assert compute_line('118.00', 1, 18).line_total == Decimal('118.00')
+
+    set_setting('prices_include_tax', False)
+    db.session.commit()
+    assert compute_line('118.00', 1, 18).line_total == Decimal('139.24')
+
+
+@pytest.mark.parametrize('value', ['99AAAAA0000A1Z5', '29AAAAA0000A1Z', '29AAAAA-000A1Z5', 'GSTN000001'])
+def test_invalid_gstin_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_gstin(value)
+
+
+def test_gstin_is_normalized():
+    assert parse_gstin(' 29aaaaa0000a1z5 ') == '29AAAAA0000A1Z5'
+    assert parse_gstin('') is None
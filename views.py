@@ -0,0 +1,389 @@
+import os
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, flash, jsonify, send_file
+from flask_login import login_user, logout_user, login_required
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.security import check_password_hash
+from werkzeug.utils import secure_filename
+from models import db, User, Product, Sale, SaleItem, ShopInfo, Payment, StoreStock
+from invoice import generate_invoice_pdf, format_invoice_no
+from idempotency import idempotent
+from customers import find_or_create_customer, adjust_balance
+from tax import (GST_RATES, to_money, to_rate, state_code, parse_gstin, parse_place_of_supply, is_interstate,
+                 compute_line, apply_line_tax, apply_invoice_totals)
+from stores import (get_current_store, get_current_terminal_id, products_with_stock, set_stock,
+                    take_stock, next_invoice_number)
+from cache import SETTINGS, get_shop_info, get_settings, get_setting, set_setting, parse_setting
+
+main_bp = Blueprint('main', __name__)
+
+# Allowed extensions for logo upload
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+# -------------------------
+# Helper Functions
+# -------------------------
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def save_invoice_pdf(sale):
+    """Write the sale's invoice PDF. Returns its path, or None if generation failed."""
+    invoice_path = os.path.join('invoices', f"{sale.invoice_no}.pdf")
+    try:
+        os.makedirs('invoices', exist_ok=True)
+        generate_invoice_pdf(sale.id, invoice_path)
+    except Exception as e:
+        current_app.logger.error(f"Invoice PDF for {sale.invoice_no} failed: {e}")
+        return None
+    return invoice_path
+
+# -------------------------
+# Routes
+# -------------------------
+@main_bp.route('/')
+@login_required
+def index():
+    store = get_current_store()
+    products = products_with_stock(store.id).all()
+    sales = Sale.query.filter_by(store_id=store.id).order_by(Sale.created_at.desc()).limit(5).all()
+    low_stock = [p for p in products if p.quantity <= p.low_stock_threshold]
+    shop = get_shop_info()
+    return render_template('index.html', products=products, sales=sales, low_stock=low_stock, shop=shop)
+
+@main_bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username'].strip()
+        password = request.form['password']
+
+        user = User.query.filter_by(username=username).first()
+        if user and check_password_hash(user.password_hash, password):
+            login_user(user)
+            return redirect(url_for('main.index'))
+        else:
+            flash("Invalid username or password", "danger")
+
+    return render_template('login.html')
+
+@main_bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.login'))
+
+# Example protected route
+@main_bp.route('/products')
+@login_required
+def products():
+    items = products_with_stock(get_current_store().id).all()
+    shop = get_shop_info()
+    return render_template('products.html', products=items, shop=shop, gst_rates=GST_RATES)
+
+@main_bp.route('/sales')
+@login_required
+def sales():
+    # Checkout posts JSON to /create-sale; this page only renders the POS screen
+    store = get_current_store()
+    products = products_with_stock(store.id).all()
+    sales = Sale.query.filter_by(store_id=store.id).order_by(Sale.created_at.desc()).all()
+    shop = get_shop_info()
+    return render_template('sales.html', products=products, sales=sales,shop=shop)
+
+@main_bp.route('/settings', methods=['GET', 'POST'])
+@login_required
+def settings():
+    shop = ShopInfo.query.first()
+    if not shop:
+        shop = ShopInfo()
+        db.session.add(shop)
+        db.session.commit()
+
+    if request.method == 'POST':
+        shop.shop_name = request.form['shop_name']
+        shop.address = request.form['address']
+        shop.phone = request.form['phone']
+        shop.gstin = request.form['gstin']
+
+        for key in SETTINGS:
+            try:
+                set_setting(key, parse_setting(key, request.form.get(f'setting_{key}')))
+            except (ValueError, AttributeError):
+                db.session.rollback()
+                flash(f"Invalid value for {SETTINGS[key][2]}", "danger")
+                return redirect(url_for('main.settings'))
+
+        file = request.files.get('logo')
+        if file and allowed_file(file.filename):
+            filename = secure_filename(file.filename)
+            file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+            shop.logo_filename = filename
+
+        db.session.commit()
+        flash("Shop details updated!", "success")
+        return redirect(url_for('main.settings'))
+
+    return render_template('settings.html', shop=shop, settings=get_settings(), setting_defs=SETTINGS)
+
+@main_bp.route('/products/edit/<int:pid>', methods=['GET', 'POST'])
+@login_required
+def edit_product(pid):
+    store = get_current_store()
+    product = products_with_stock(store.id).filter(Product.id == pid).first_or_404()
+    if request.method == 'POST':
+        try:
+            product.name = request.form['name']
+            product.category = request.form['category']
+            product.cost_price = to_money(request.form['cost_price'])
+            product.selling_price = to_money(request.form['selling_price'])
+            product.hsn_code = request.form.get('hsn_code', '').strip() or None
+            product.gst_rate = to_rate(request.form.get('gst_rate'))
+            product.low_stock_threshold = int(request.form['threshold'])
+            set_stock(store.id, product.id, int(request.form['quantity']))
+            db.session.commit()
+            flash('Product updated successfully.', 'success')
+            return redirect(url_for('main.products'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error updating product: {e}', 'danger')
+    products = products_with_stock(store.id).all()
+    return render_template("products.html", products=products, edit_product=product)
+
+@main_bp.route('/products/add', methods=['POST'])
+@login_required
+def add_product():
+    try:
+        product = Product(
+            name=request.form['name'],
+            category=request.form.get('category', ''),
+            cost_price=to_money(request.form['cost_price']),
+            selling_price=to_money(request.form['selling_price']),
+            hsn_code=request.form.get('hsn_code', '').strip() or None,
+            gst_rate=to_rate(request.form.get('gst_rate')),
+            low_stock_threshold=int(request.form.get('threshold', get_setting('default_low_stock_threshold')))
+        )
+        db.session.add(product)
+        db.session.flush()
+        set_stock(get_current_store().id, product.id, int(request.form['quantity']))
+        db.session.commit()
+        flash('Product added successfully.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error adding product: {e}', 'danger')
+    return redirect(url_for('main.products'))
+
+@main_bp.route('/products/delete/<int:pid>')
+@login_required
+def delete_product(pid):
+    prod = Product.query.get_or_404(pid)
+    StoreStock.query.filter_by(product_id=prod.id).delete()
+    db.session.delete(prod)
+    db.session.commit()
+    flash('Product deleted!', 'success')
+    return redirect(url_for('main.products'))
+
+@main_bp.route('/create-sale', methods=['POST'])
+@idempotent
+def create_sale():
+    data = request.get_json()
+    if not data or 'items' not in data or not data.get('customer_name'):
+        return jsonify({'error': 'Bad request, missing customer name or items'}), 400
+
+    customer_name = data['customer_name'].strip()
+    if not customer_name:
+        return jsonify({'error': 'Customer name cannot be empty'}), 400
+    customer_phone = (data.get('customer_phone') or '').strip() or None
+
+    items_data = data['items']
+    if not items_data:
+        return jsonify({'error': 'At least one item is required'}), 400
+
+    try:
+        payment_amount = to_money(data.get('payment_amount', 0))  # optional initial payment
+    except ValueError:
+        return jsonify({'error': 'Invalid payment amount'}), 400
+
+    try:
+        customer_gstin = parse_gstin(data.get('customer_gstin'))
+        place_of_supply = parse_place_of_supply(data.get('place_of_supply'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    store = get_current_store()
+
+    try:
+        customer = find_or_create_customer(customer_name, customer_phone, gstin=customer_gstin)
+
+        # Place of supply: explicit, else the customer's GSTIN state, else the shop's own state
+        shop = get_shop_info()
+        place_of_supply = (place_of_supply or state_code(customer.gstin)
+                           or state_code(shop.gstin if shop else None))
+        interstate = is_interstate(place_of_supply)
+
+        lines = []
+        sale_items = []
+        for it in items_data:
+            product_id = it.get('product_id')
+            qty = int(it.get('quantity', 0))
+            if qty < 1:
+                db.session.rollback()
+                return jsonify({'error': f'Invalid quantity for product {product_id}'}), 400
+
+            product = Product.query.get(product_id)
+            if not product:
+                db.session.rollback()
+                return jsonify({'error': f'Product with ID {product_id} not found'}), 404
+
+            # Conditional decrement of this store's stock row only
+            if not take_stock(store.id, product.id, qty):
+                db.session.rollback()
+                return jsonify({'error': f'Insufficient stock for product {product.name}'}), 400
+
+            # Tax is computed once here and stored on the line
+            line = compute_line(product.selling_price, qty, product.gst_rate, interstate)
+            sale_item = SaleItem(product_id=product.id, qty=qty, price=product.selling_price,
+                                 hsn_code=product.hsn_code, gst_rate=product.gst_rate)
+            apply_line_tax(sale_item, line)
+            sale_items.append(sale_item)
+            lines.append(line)
+
+        # Allocate the store's invoice number last so its sequence row is
+        # locked for as short a time as possible
+        inv_no = format_invoice_no(next_invoice_number(store.id), store.code)
+
+        # Create Sale
+        sale = Sale(invoice_no=inv_no, store_id=store.id, terminal_id=get_current_terminal_id(),
+                    customer_id=customer.id, customer_name=customer_name, buyer_gstin=customer.gstin or None,
+                    place_of_supply=place_of_supply, is_interstate=interstate)
+        apply_invoice_totals(sale, lines)
+        total = sale.total
+        db.session.add(sale)
+        db.session.flush()  # get sale.id
+        for sale_item in sale_items:
+            sale_item.sale_id = sale.id
+            db.session.add(sale_item)
+
+        # Create Payment if amount > 0
+        payment_amount = max(payment_amount, to_money(0))
+        if payment_amount > 0:
+            if payment_amount > total:
+                payment_amount = total  # cannot pay more than total
+            payment = Payment(sale_id=sale.id, amount=payment_amount)
+            db.session.add(payment)
+
+        adjust_balance(customer.id, total - payment_amount)
+        db.session.commit()
+
+        # The sale is committed from here on: a PDF failure must not become a
+        # 5xx, or an idempotent retry would record the sale a second time.
+        # GET /invoice/<invoice_no> regenerates a missing PDF.
+        invoice_path = save_invoice_pdf(sale)
+
+        return jsonify({
+            'invoice': invoice_path,
+            'invoice_no': sale.invoice_no,
+            'customer_id': customer.id,
+            # Numbers, as these legacy endpoints always returned (the API sends money as strings)
+            'paid_amount': float(payment_amount),
+            'due_amount': float(sale.total - payment_amount)
+        })
+
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Database error', 'details': str(e)}), 500
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Unexpected error', 'details': str(e)}), 500
+
+
+@main_bp.route('/invoice/<invoice_no>')
+def get_invoice(invoice_no):
+    path = os.path.join('invoices', f"{invoice_no}.pdf")
+    if not os.path.exists(path):
+        # Never generated (or generation failed at checkout): rebuild from the stored sale
+        sale = Sale.query.filter_by(invoice_no=invoice_no).first_or_404()
+        path = save_invoice_pdf(sale)
+        if not path:
+            return 'Invoice could not be generated', 500
+    # PDFs are written relative to the working directory, not the app root
+    return send_file(os.path.abspath(path))
+
+@main_bp.route('/invoice_view/<invoice_no>')
+def invoice_view(invoice_no):
+    sale = Sale.query.filter_by(invoice_no=invoice_no).first_or_404()
+    items = SaleItem.query.filter_by(sale_id=sale.id).all()
+    # Attach products for template
+    for si in items:
+        si.product = Product.query.get(si.product_id)
+    return render_template('invoice_view.html', sale=sale, items=items)
+
+@main_bp.route('/payments', methods=['GET', 'POST'])
+@login_required
+@idempotent
+def payments():
+    if request.method == 'POST':
+        sale_id = request.form.get('sale_id')
+        amount = request.form.get('amount')
+        if not sale_id or not amount:
+            flash("Sale or amount missing!", "danger")
+            return redirect(url_for('main.payments'))
+
+        try:
+            amount = to_money(amount)
+        except ValueError:
+            flash("Invalid amount!", "danger")
+            return redirect(url_for('main.payments'))
+
+        sale = Sale.query.get(sale_id)
+        if not sale:
+            flash("Sale not found!", "danger")
+            return redirect(url_for('main.payments'))
+
+        paid = sale.paid_amount
+        due = sale.total - paid
+        if amount <= 0 or amount > due:
+            flash(f"Invalid amount! Due for Invoice {sale.invoice_no} is ₹{due:.2f}", "danger")
+            return redirect(url_for('main.payments'))
+
+        # Add new payment
+        payment = Payment(sale_id=sale.id, amount=amount)
+        db.session.add(payment)
+        adjust_balance(sale.customer_id, -amount)
+        db.session.commit()
+        flash(f"Payment of ₹{amount:.2f} recorded for Invoice {sale.invoice_no}", "success")
+        return redirect(url_for('main.payments'))
+
+    # GET request: show this store's sales
+    sales = Sale.query.filter_by(store_id=get_current_store().id).order_by(Sale.created_at.desc()).all()
+    return render_template('payments.html', sales=sales,Payment=Payment)
+
+@main_bp.route('/add-payment/<int:sale_id>', methods=['POST'])
+@login_required
+@idempotent
+def add_payment(sale_id):
+    try:
+        sale = Sale.query.get_or_404(sale_id)
+        data = request.get_json()
+        if not data or 'amount' not in data:
+            return jsonify({'error': 'Invalid request'}), 400
+
+        try:
+            amount = to_money(data['amount'])
+        except ValueError:
+            return jsonify({'error': 'Invalid payment amount'}), 400
+        paid = sale.paid_amount
+        due = sale.total - paid
+
+        if amount <= 0 or amount > due:
+            return jsonify({'error': 'Invalid payment amount'}), 400
+
+        payment = Payment(sale_id=sale.id, amount=amount)
+        db.session.add(payment)
+        adjust_balance(sale.customer_id, -amount)
+        db.session.commit()
+        # Numbers, as these legacy endpoints always returned (the API sends money as strings)
+        return jsonify({'success': True, 'paid_amount': float(paid + amount)})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
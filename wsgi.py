@@ -0,0 +1,10 @@
+import os
+
+from app import create_app, preload_heavy_modules
+
+app = create_app()
+
+# With gunicorn's preload_app the master imports this module once; loading the
+# heavy subsystems here lets every forked worker share them copy-on-write.
+if os.environ.get('PRELOAD_HEAVY_MODULES', '1') == '1':
+    preload_heavy_modules()